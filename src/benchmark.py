@@ -0,0 +1,217 @@
+import os
+import gc
+import functools
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import cv2
+import numpy as np
+from dna_crypto import image_to_dna, dna_to_image, image_to_dna_codes, dna_codes_to_image, dna_codes_to_text, dna_text_to_codes
+from hybrid_crypto import encrypt_dna, decrypt_dna, KeyManager, SegmentedCipher, KEY_SIZE
+from chaos import scramble_pixels, unscramble_pixels, PERMUTATION_CACHE
+from steganography import hide_data_in_image, extract_data_from_image, stego_capacity
+
+# Synthetic image sizes as (height, width)
+SIZES = {
+    "256": (256, 256),
+    "512": (512, 512),
+    "1024": (1024, 1024),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+    "8k": (4320, 7680),
+}
+DEFAULT_SIZES = ["256", "512"]
+MODES = {"gray": 1, "rgb": 3}
+# Stage groups: the string-based stage functions, the packed path used by
+# encrypt_image / decrypt_image, and LSB steganography
+PIPELINES = ("text", "packed", "stego")
+
+def synthetic_image(size, mode, seed=0):
+    """Generate a reproducible test image: smooth gradients plus noise, like a photo"""
+    height, width = SIZES[size]
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = (x * 255 // max(width - 1, 1) + y * 255 // max(height - 1, 1)) // 2
+    channels = [(base + rng.integers(0, 32, size=(height, width)) + 40 * c) % 256 for c in range(MODES[mode])]
+    image = np.stack(channels, axis=-1).astype(np.uint8)
+    return image[..., 0] if mode == "gray" else image
+
+def measure(function, *args, repeat=1, trace_memory=True, setup=None):
+    """
+    Time a stage and record its allocation peak
+
+    Timed runs execute without tracemalloc, which slows allocation-heavy
+    code down considerably; the peak comes from one extra traced run.
+    `setup` is called before every run.
+
+    Returns:
+        (result of the last call, best wall time in seconds, peak traced bytes or None)
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        result = None
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if trace_memory:
+        result = None
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        result = function(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, best, peak
+
+def pipeline_stages(image, key_manager, workdir, pipelines=PIPELINES):
+    """
+    Yield (stage name, function, args, bytes processed) for every timed stage
+
+    Each stage's input comes from the previous stage's result, which is
+    passed back in through the generator.
+    """
+    nbytes = image.nbytes
+
+    if "text" in pipelines:
+        dna_sequence, shape = (yield "image_to_dna", image_to_dna, (image,), nbytes)
+        scrambled = (yield "scramble_pixels", scramble_pixels, (dna_sequence,), nbytes)
+        encrypted = (yield "encrypt_dna", encrypt_dna, (scrambled, key_manager), nbytes)
+        decrypted = (yield "decrypt_dna", decrypt_dna, (encrypted, key_manager), nbytes)
+        unscrambled = (yield "unscramble_pixels", unscramble_pixels, (decrypted,), nbytes)
+        yield "dna_to_image", dna_to_image, (unscrambled, shape), nbytes
+        del dna_sequence, scrambled, encrypted, decrypted, unscrambled
+
+    if "packed" in pipelines:
+        cipher = SegmentedCipher(key_manager=key_manager)
+        codes = (yield "image_to_dna_codes", image_to_dna_codes, (image,), nbytes)
+        scrambled = (yield "scramble_codes", scramble_pixels, (codes,), nbytes)
+        yield "scramble_codes_packed", functools.partial(scramble_pixels, method="packed"), (codes,), nbytes
+        yield "scramble_image_pixels", functools.partial(scramble_pixels, mode="pixel"), (image,), nbytes
+        yield "scramble_image_blocks", functools.partial(scramble_pixels, mode="block"), (image,), nbytes
+        text = dna_codes_to_text(scrambled, as_bytes=True)
+        segments = (yield "encrypt_segmented", cipher.encrypt, (text,), nbytes)
+        decrypted = (yield "decrypt_segmented", cipher.decrypt, (segments,), nbytes)
+        codes = dna_text_to_codes(b"".join(decrypted))
+        unscrambled = (yield "unscramble_codes", unscramble_pixels, (codes,), nbytes)
+        yield "dna_codes_to_image", dna_codes_to_image, (unscrambled, image.shape), nbytes
+        del codes, scrambled, text, segments, decrypted, unscrambled
+
+    if "stego" not in pipelines:
+        return
+
+    # Steganography: hide a payload that fills the cover's LSB capacity
+    cover_path = os.path.join(workdir, "cover.png")
+    stego_path = os.path.join(workdir, "stego.png")
+    cv2.imwrite(cover_path, image)
+    payload = np.random.default_rng(1).integers(0, 256, max(stego_capacity(image), 1), dtype=np.uint8).tobytes()
+    yield "hide_data_in_image", hide_data_in_image, (cover_path, payload, stego_path), len(payload)
+    yield "extract_data_from_image", extract_data_from_image, (stego_path, True), len(payload)
+
+def run_benchmarks(sizes=DEFAULT_SIZES, modes=tuple(MODES), pipelines=PIPELINES, repeat=1, trace_memory=True):
+    """
+    Run every stage for every synthetic image size and mode
+
+    Returns:
+        Results dictionary with environment info and one record per stage
+    """
+    key_manager = KeyManager.from_key(os.urandom(KEY_SIZE))
+    records = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            for mode in modes:
+                image = synthetic_image(size, mode)
+                stages = pipeline_stages(image, key_manager, workdir, pipelines)
+                result = None
+                while True:
+                    try:
+                        name, function, args, nbytes = stages.send(result)
+                    except StopIteration:
+                        break
+                    # Time every stage cold, as separate encrypt and decrypt runs would be
+                    result, seconds, peak = measure(function, *args, repeat=repeat, trace_memory=trace_memory,
+                                                    setup=PERMUTATION_CACHE.clear)
+                    record = {
+                        "size": size,
+                        "mode": mode,
+                        "shape": list(image.shape),
+                        "stage": name,
+                        "bytes": int(nbytes),
+                        "seconds": seconds,
+                        "mb_per_s": nbytes / 1e6 / seconds if seconds > 0 else None,
+                        "peak_bytes": peak,
+                    }
+                    records.append(record)
+                    print(f"[ℹ] {size:>6} {mode:<4} {name:<24} {seconds * 1000:10.2f} ms "
+                          f"{record['mb_per_s'] or 0:10.2f} MB/s {(peak or 0) / 2**20:10.2f} MB peak")
+                result = None
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "pipelines": list(pipelines),
+        "results": records,
+    }
+
+def compare_results(baseline, current, threshold=0.10):
+    """
+    Compare two result sets stage by stage
+
+    Returns:
+        List of (key, baseline seconds, current seconds, relative change), and
+        prints regressions slower than the threshold
+    """
+    def index(results):
+        return {(r["size"], r["mode"], r["stage"]): r for r in results["results"]}
+
+    old, new = index(baseline), index(current)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key]["seconds"], new[key]["seconds"]
+        change = (after - before) / before if before > 0 else 0.0
+        rows.append((key, before, after, change))
+        marker = "[!]" if change > threshold else "[✔]" if change < -threshold else "   "
+        print(f"{marker} {' '.join(key):<40} {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms ({change:+.1%})")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DNA-Chaos-AES encrypt/decrypt pipeline stage by stage")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, choices=list(SIZES),
+                        help="Synthetic image sizes to benchmark")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES), help="Color modes")
+    parser.add_argument("--pipelines", nargs="+", default=list(PIPELINES), choices=list(PIPELINES),
+                        help="Stage groups to run (the text pipeline is very slow beyond 512x512)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage (best time is reported)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run that measures peak memory")
+    parser.add_argument("--output", default="benchmark_results.json", help="Path to write JSON results")
+    parser.add_argument("--compare", help="Baseline JSON results to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown flagged as a regression")
+
+    args = parser.parse_args()
+
+    results = run_benchmarks(sizes=args.sizes, modes=args.modes, pipelines=args.pipelines, repeat=args.repeat,
+                             trace_memory=not args.no_memory)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"[✔] Benchmark results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results, threshold=args.threshold)
+        regressions = [row for row in rows if row[3] > args.threshold]
+        print(f"[ℹ] {len(regressions)} regression(s) above {args.threshold:.0%}")
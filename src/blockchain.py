@@ -1,20 +1,265 @@
 import hashlib
 import json
 import os
+import sys
+import glob
 import time
+import argparse
+import threading
+from hashing import HashingService, HashCache
+from container import CONTAINER_SUFFIX
 
-BLOCKCHAIN_FILE = "blockchain_ledger.json"
+BLOCKCHAIN_FILE = "blockchain_ledger.jsonl"
+# Original storage: the whole chain as one JSON array, rewritten on every append
+LEGACY_BLOCKCHAIN_FILE = "blockchain_ledger.json"
+# Blocks appended between fsyncs, and the longest time pending blocks stay unsynced
+SYNC_EVERY = 100
+SYNC_INTERVAL = 1.0
+# Digest cache kept in each registered directory
+HASH_CACHE_FILE = ".hash_cache.json"
+
+class JsonLinesLedger:
+    """
+    Append-only block storage: one JSON line per block plus a hash index.
+
+    The index file (`<path>.index`) holds one JSON line per block with its
+    image hash, block index and byte range in the ledger, so opening the
+    ledger never parses the blocks and lookups by image hash are O(1).
+    Appends are fsynced in batches of `sync_every` blocks or every
+    `sync_interval` seconds, whichever comes first; close() syncs the rest.
+    """
+
+    def __init__(self, path=BLOCKCHAIN_FILE, index_path=None, sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.index_path = index_path or path + ".index"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._ranges = []
+        self._by_hash = {}
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._last_block = None
+        self._load_index()
+        self._ledger = open(self.path, "ab")
+        self._index = open(self.index_path, "a")
+
+    def _load_index(self):
+        """Load the index and bring it up to date with the ledger after a crash."""
+        ledger_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        entries = []
+        repaired = False
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        repaired = True  # torn final line
+                        break
+                    entries.append(json.loads(line))
+        # Drop entries past the end of the ledger (index synced before the ledger)
+        while entries and entries[-1]["offset"] + entries[-1]["length"] > ledger_size:
+            entries.pop()
+            repaired = True
+        for entry in entries:
+            self._remember(entry["image_hash"], entry["offset"], entry["length"])
+
+        # Index any blocks appended after the last indexed one and drop a torn final line
+        end = entries[-1]["offset"] + entries[-1]["length"] if entries else 0
+        if end < ledger_size:
+            repaired = True
+            with open(self.path, "rb") as f:
+                f.seek(end)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    block = json.loads(line)
+                    self._remember(block.get("image_hash"), end, len(line))
+                    end += len(line)
+            if end < ledger_size:
+                with open(self.path, "r+b") as f:
+                    f.truncate(end)
+        # Rewrite the index when it had to be repaired
+        if repaired:
+            with open(self.index_path, "w") as f:
+                for index, (offset, length, image_hash) in enumerate(self._ranges):
+                    f.write(self._index_line(image_hash, index, offset, length))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _remember(self, image_hash, offset, length):
+        self._ranges.append((offset, length, image_hash))
+        if image_hash is not None:
+            self._by_hash.setdefault(image_hash, len(self._ranges) - 1)
+
+    @staticmethod
+    def _index_line(image_hash, index, offset, length):
+        return json.dumps({"image_hash": image_hash, "index": index, "offset": offset, "length": length}) + "\n"
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def append(self, block):
+        """Append a block and return its index."""
+        line = (json.dumps(block, sort_keys=True) + "\n").encode()
+        with self._lock:
+            offset = self._ranges[-1][0] + self._ranges[-1][1] if self._ranges else 0
+            self._ledger.write(line)
+            self._remember(block.get("image_hash"), offset, len(line))
+            index = len(self._ranges) - 1
+            self._index.write(self._index_line(block.get("image_hash"), index, offset, len(line)))
+            self._last_block = block
+            self._pending += 1
+            if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+        return index
+
+    def _sync(self):
+        # Ledger first, so a synced index entry never points past synced blocks
+        self._ledger.flush()
+        os.fsync(self._ledger.fileno())
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Flush and fsync pending blocks."""
+        with self._lock:
+            self._sync()
+
+    def get(self, index):
+        """Read one block by index."""
+        if index < 0:
+            index += len(self._ranges)
+        if index == len(self._ranges) - 1 and self._last_block is not None:
+            return self._last_block
+        offset, length, _ = self._ranges[index]
+        with self._lock:
+            self._ledger.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def last_block(self):
+        """Return the most recent block (None for an empty ledger)."""
+        if not self._ranges:
+            return None
+        if self._last_block is None:
+            self._last_block = self.get(-1)
+        return self._last_block
+
+    def find(self, image_hash):
+        """Return the index of the first block holding `image_hash`, or None."""
+        return self._by_hash.get(image_hash)
+
+    def blocks(self):
+        """Iterate over every block in order."""
+        with self._lock:
+            self._ledger.flush()
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        """Sync pending blocks and close the files."""
+        with self._lock:
+            if self._ledger.closed:
+                return
+            self._sync()
+            self._ledger.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def migrate_json_ledger(ledger, legacy_path=LEGACY_BLOCKCHAIN_FILE):
+    """
+    Copy the blocks of a JSON-array ledger into an empty append-only ledger.
+
+    Blocks are copied unchanged, so their hashes and the chain links stay valid.
+    The legacy file is left in place.
+
+    Returns:
+        Number of blocks migrated
+    """
+    if len(ledger) or not os.path.exists(legacy_path):
+        return 0
+    with open(legacy_path, "r") as f:
+        chain = json.load(f)
+    for block in chain:
+        ledger.append(block)
+    ledger.sync()
+    print(f"[ℹ] Migrated {len(chain)} block(s) from {legacy_path} to {ledger.path}")
+    return len(chain)
+
+def _merkle_leaf(image_hash):
+    # Leaves and inner nodes are domain-separated so an inner node can never pass as a leaf
+    return hashlib.sha256(b"\x00" + image_hash.encode()).digest()
+
+def _merkle_node(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def merkle_tree(image_hashes):
+    """
+    Build every level of the Merkle tree over a list of image hashes.
+
+    An odd node at the end of a level is carried up unchanged.
+
+    Returns:
+        List of levels (lists of digests), leaves first and the root last
+    """
+    if not image_hashes:
+        raise ValueError("Cannot build a Merkle tree over an empty batch")
+    levels = [[_merkle_leaf(h) for h in image_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_proofs(levels):
+    """Return the inclusion path of every leaf as [side, sibling hex] pairs from the leaves up."""
+    hex_levels = [[node.hex() for node in level] for level in levels[:-1]]
+    proofs = []
+    for leaf_index in range(len(levels[0])):
+        path = []
+        index = leaf_index
+        for level in hex_levels:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(["left" if index & 1 else "right", level[sibling]])
+            index >>= 1
+        proofs.append(path)
+    return proofs
+
+def verify_merkle_proof(image_hash, path, merkle_root):
+    """Check that `image_hash` is a leaf of the tree with the given root (hex)."""
+    node = _merkle_leaf(image_hash)
+    for side, sibling in path:
+        sibling = bytes.fromhex(sibling)
+        node = _merkle_node(sibling, node) if side == "left" else _merkle_node(node, sibling)
+    return node.hex() == merkle_root
 
 class Blockchain:
-    def __init__(self):
-        """Initialize the blockchain by loading existing data or creating a new one."""
-        if os.path.exists(BLOCKCHAIN_FILE):
-            with open(BLOCKCHAIN_FILE, "r") as f:
-                self.chain = json.load(f)
-        else:
-            self.chain = []
+    def __init__(self, ledger=None):
+        """Open the append-only ledger (migrating a legacy JSON ledger once) or create a new one."""
+        if ledger is None:
+            ledger = JsonLinesLedger(BLOCKCHAIN_FILE)
+            migrate_json_ledger(ledger)
+        self.ledger = ledger
+        if not len(self.ledger):
             self.create_genesis_block()
 
+    @property
+    def chain(self):
+        """All blocks as a list (reads the whole ledger)."""
+        return list(self.ledger.blocks())
+
     def create_genesis_block(self):
         """Create the first (genesis) block in the blockchain."""
         genesis_block = {
@@ -23,32 +268,76 @@ class Blockchain:
             "previous_hash": "0",
             "image_hash": "GENESIS_BLOCK"
         }
-        self.chain.append(genesis_block)
+        self.ledger.append(genesis_block)
         self.save_blockchain()
 
     def add_block(self, image_hash):
         """Add a new block to the blockchain with the encrypted image hash."""
-        previous_block = self.chain[-1]
+        previous_block = self.ledger.last_block()
         new_block = {
-            "index": len(self.chain),
+            "index": len(self.ledger),
             "timestamp": time.time(),
             "previous_hash": self.hash_block(previous_block),
             "image_hash": image_hash
         }
-        self.chain.append(new_block)
-        self.save_blockchain()
+        self.ledger.append(new_block)
+        return new_block
+
+    def add_batch(self, image_hashes):
+        """
+        Commit many image hashes in one block holding only their Merkle root.
+
+        Returns:
+            One inclusion proof per image hash, in order: a dict with the
+            image hash, block index, leaf index and Merkle path
+        """
+        image_hashes = list(image_hashes)
+        levels = merkle_tree(image_hashes)
+        previous_block = self.ledger.last_block()
+        new_block = {
+            "index": len(self.ledger),
+            "timestamp": time.time(),
+            "previous_hash": self.hash_block(previous_block),
+            "merkle_root": levels[-1][0].hex(),
+            "batch_size": len(image_hashes)
+        }
+        self.ledger.append(new_block)
+        return [{
+            "image_hash": image_hash,
+            "block_index": new_block["index"],
+            "leaf_index": leaf_index,
+            "path": path
+        } for leaf_index, (image_hash, path) in enumerate(zip(image_hashes, merkle_proofs(levels)))]
 
     def save_blockchain(self):
-        """Save the blockchain to a file."""
-        with open(BLOCKCHAIN_FILE, "w") as f:
-            json.dump(self.chain, f, indent=4)
+        """Flush pending blocks to disk (appends are otherwise synced in batches)."""
+        self.ledger.sync()
+
+    def close(self):
+        """Sync and close the ledger."""
+        self.ledger.close()
 
-    def verify_image_integrity(self, image_hash):
-        """Verify if the given image hash exists in the blockchain."""
-        for block in self.chain:
-            if block["image_hash"] == image_hash:
-                return True
-        return False
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def verify_image_integrity(self, image_hash, proof=None):
+        """
+        Verify if the given image hash exists in the blockchain.
+
+        Hashes committed with add_batch need the inclusion proof add_batch
+        returned; it is checked against its block's Merkle root in O(log n).
+        """
+        if proof is None:
+            return self.ledger.find(image_hash) is not None
+        if proof["image_hash"] != image_hash or not 0 <= proof["block_index"] < len(self.ledger):
+            return False
+        block = self.ledger.get(proof["block_index"])
+        if "merkle_root" not in block:
+            return block.get("image_hash") == image_hash
+        return verify_merkle_proof(image_hash, proof["path"], block["merkle_root"])
 
     @staticmethod
     def hash_block(block):
@@ -56,14 +345,87 @@ class Blockchain:
         block_string = json.dumps(block, sort_keys=True)
         return hashlib.sha256(block_string.encode()).hexdigest()
 
-def hash_encrypted_image():
-    """Generate SHA-256 hash of the encrypted image."""
-    with open("images/encrypted.npy", "rb") as f:
-        file_bytes = f.read()
-    return hashlib.sha256(file_bytes).hexdigest()
+def hash_encrypted_image(path="images/encrypted.dnac", service=None):
+    """Generate SHA-256 hash of the encrypted image (streamed in chunks)."""
+    return (service or HashingService()).hash(path)
+
+def register_directory(blockchain, directory, pattern="*" + CONTAINER_SUFFIX, proofs_path=None, workers=None):
+    """
+    Hash every matching file under a directory and commit the new ones as one Merkle batch.
+
+    Digests are cached in `<directory>/.hash_cache.json` so unchanged files are
+    not read again, and files whose current hash already has a proof are skipped.
+
+    Args:
+        blockchain: Blockchain to commit to
+        directory: Output directory to register
+        pattern: Glob pattern of the artifacts to register (searched recursively)
+        proofs_path: JSON file mapping relative paths to inclusion proofs
+            (default: <directory>/proofs.json); new proofs are merged in
+        workers: Hashing threads
+
+    Returns:
+        Dictionary of the newly committed proofs by relative path
+    """
+    if proofs_path is None:
+        proofs_path = os.path.join(directory, "proofs.json")
+    proofs = {}
+    if os.path.exists(proofs_path):
+        with open(proofs_path) as f:
+            proofs = json.load(f)
+
+    paths = sorted(glob.glob(os.path.join(directory, "**", pattern), recursive=True))
+    service = HashingService(cache=HashCache(os.path.join(directory, HASH_CACHE_FILE)), workers=workers)
+    digests = service.hash_many(paths)
+    service.cache.save()
+    print(f"[ℹ] Hashed {len(paths)} file(s): {service.misses} read, {service.hits} from cache")
+
+    pending = {}
+    for path, digest in digests.items():
+        name = os.path.relpath(path, directory)
+        if name not in proofs or proofs[name]["image_hash"] != digest:
+            pending[name] = digest
+    if not pending:
+        return {}
+
+    committed = dict(zip(pending, blockchain.add_batch(pending.values())))
+    blockchain.save_blockchain()
+    proofs.update(committed)
+    with open(proofs_path, "w") as f:
+        json.dump(proofs, f, indent=4)
+    return committed
 
 if __name__ == "__main__":
-    blockchain = Blockchain()
-    image_hash = hash_encrypted_image()
-    blockchain.add_block(image_hash)
-    print("[✔] Encrypted image hash added to blockchain!")
+    parser = argparse.ArgumentParser(description="Blockchain integrity ledger for encrypted images")
+    parser.add_argument("--register", metavar="DIR", help="Register every encrypted artifact under an output directory")
+    parser.add_argument("--pattern", default="*" + CONTAINER_SUFFIX, help="Glob pattern of artifacts to register")
+    parser.add_argument("--proofs", help="Inclusion proof file (default: <DIR>/proofs.json)")
+    parser.add_argument("--workers", type=int, help="Hashing threads")
+    parser.add_argument("--verify", metavar="FILE", help="Verify a file against the ledger (use --proofs for batched files)")
+
+    args = parser.parse_args()
+
+    with Blockchain() as blockchain:
+        if args.register:
+            committed = register_directory(blockchain, args.register, pattern=args.pattern, proofs_path=args.proofs,
+                                           workers=args.workers)
+            if committed:
+                print(f"[✔] Registered {len(committed)} new artifact(s) in one block")
+            else:
+                print("[ℹ] No new or changed artifacts to register")
+        elif args.verify:
+            image_hash = hash_encrypted_image(args.verify)
+            proof = None
+            if args.proofs:
+                with open(args.proofs) as f:
+                    proofs = json.load(f)
+                proof = next((p for p in proofs.values() if p["image_hash"] == image_hash), None)
+            if blockchain.verify_image_integrity(image_hash, proof):
+                print(f"[✔] {args.verify} is recorded in the blockchain")
+            else:
+                print(f"[✘] {args.verify} is not recorded in the blockchain")
+                sys.exit(1)
+        else:
+            image_hash = hash_encrypted_image()
+            blockchain.add_block(image_hash)
+            print("[✔] Encrypted image hash added to blockchain!")
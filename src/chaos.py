@@ -1,33 +1,295 @@
+import threading
 import numpy as np
+from collections import OrderedDict
+from itertools import accumulate, repeat
+
+# Permutation generators: "argsort" sorts the float64 chaotic sequence
+# (int64 indices); "packed" quantizes it to 32-bit keys and sorts 64-bit
+# words holding (key << 32 | index) in place (uint32 indices). The sort
+# itself is 2-3x faster, but generating the sequence dominates: end to end
+# both take about the same time, and packed peaks about 25% lower from 1
+# megapixel up (measured 12.6M elements: 2.30 s / 201 MB vs 2.34 s / 151 MB).
+# They give different permutations, so the method is part of the scrambling key.
+PERMUTATION_METHODS = ("argsort", "packed")
+DEFAULT_PERMUTATION = "argsort"
+
+# Scrambling units: the nucleotides of the DNA-encoded image (4 per byte), or
+# whole pixels, rows or BxB blocks of the uint8 image before DNA encoding
+SCRAMBLE_MODES = ("nucleotide", "pixel", "row", "block")
+_SEQUENCE_CHUNK = 1 << 20
+
+# Batches with fewer lanes than this run each lane through the scalar loop,
+# which is faster than stepping all lanes with NumPy ufuncs (measured
+# crossover: about 16 lanes)
+_BATCH_LANE_CROSSOVER = 16
+
+def logistic_sequence(x, r=3.99, n=1000, out=None):
+    """ Generate raw logistic map sequence(s) into a float64 buffer
+    
+    Args:
+        x: Seed value, or 1-D array of seeds (one lane per image in a batch)
+        r: Control parameter, scalar or one value per lane
+        n: Number of iterations per lane
+        out: Optional preallocated float64 buffer of shape (n,) or (lanes, n)
+    
+    Returns:
+        Sequence array of shape (n,) for a scalar seed, (lanes, n) otherwise
+    """
+    seeds = np.asarray(x, dtype=np.float64)
+    shape = (n,) if seeds.ndim == 0 else (seeds.shape[0], n)
+    if out is not None and (out.shape != shape or out.dtype != np.float64):
+        raise ValueError(f"Output buffer must be float64 with shape {shape}, got {out.dtype} {out.shape}")
+    
+    if seeds.ndim == 0:
+        # A single lane cannot be vectorized, so iterate with Python floats
+        # and stream the values straight into the buffer without a list
+        x, r = float(seeds), float(r)
+        steps = accumulate(repeat(None, n), lambda v, _: r * v * (1 - v), initial=x)
+        next(steps)  # Skip the seed itself
+        if out is None:
+            return np.fromiter(steps, dtype=np.float64, count=n)
+        for start in range(0, n, _SEQUENCE_CHUNK):
+            stop = min(start + _SEQUENCE_CHUNK, n)
+            out[start:stop] = np.fromiter(steps, dtype=np.float64, count=stop - start)
+        return out
+    
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+    lane_count = shape[0]
+    rates = np.ascontiguousarray(np.broadcast_to(np.asarray(r, dtype=np.float64), seeds.shape))
+    
+    if lane_count < _BATCH_LANE_CROSSOVER:
+        # Few lanes: the scalar loop per lane beats a few ufunc calls per step
+        for lane in range(lane_count):
+            logistic_sequence(seeds[lane], r=rates[lane], n=n, out=out[lane])
+        return out
+    
+    # Advance every lane together: each step fills one row of a C-ordered
+    # (steps, lanes) scratch block with in-place ufuncs, and every full
+    # block is transposed into the output
+    block = np.empty((max(1, min(n, _SEQUENCE_CHUNK // lane_count)), lane_count), dtype=np.float64)
+    complement = np.empty(lane_count, dtype=np.float64)
+    previous = seeds.copy()
+    for start in range(0, n, len(block)):
+        steps = block[:min(len(block), n - start)]
+        for row in steps:
+            np.subtract(1.0, previous, out=complement)
+            np.multiply(rates, previous, out=row)
+            np.multiply(row, complement, out=row)
+            previous = row
+        out[:, start:start + len(steps)] = steps.T
+    return out
+
+def _quantize(sequence):
+    """ Map chaotic values in [0, 1) to uint32 keys floor(v * 2**32) (in place on the float buffer) """
+    sequence *= 2.0 ** 32
+    np.clip(sequence, 0, 2 ** 32 - 1, out=sequence)
+    return sequence.astype(np.uint32)
+
+def packed_permutation(x, r=3.99, n=1000):
+    """ Generate scrambling permutation(s) by sorting packed (key, index) words
+    
+    Every chaotic value is quantized to a uint32 key and packed with its
+    index into one uint64 word. Sorting the words by value orders them by
+    key with ties broken by index, so the low 32 bits are the permutation;
+    value sorts are faster than argsort and need no int64 index array.
+    Single lanes are generated chunk by chunk, so the float64 sequence is
+    never held in full.
+    
+    Args:
+        x: Seed value, or 1-D array of seeds
+        r: Control parameter, scalar or one value per lane
+        n: Sequence length per lane
+    
+    Returns:
+        uint32 permutation of shape (n,) for a scalar seed, (lanes, n) otherwise
+    """
+    if n > 2 ** 32:
+        raise ValueError(f"Cannot index {n} elements with uint32")
+    seeds = np.asarray(x, dtype=np.float64)
+    if seeds.ndim == 0:
+        x, r = float(seeds), float(r)
+        steps = accumulate(repeat(None, n), lambda v, _: r * v * (1 - v), initial=x)
+        next(steps)  # Skip the seed itself
+        words = np.empty(n, dtype=np.uint64)
+        for start in range(0, n, _SEQUENCE_CHUNK):
+            stop = min(start + _SEQUENCE_CHUNK, n)
+            chunk = words[start:stop]
+            chunk[...] = _quantize(np.fromiter(steps, dtype=np.float64, count=stop - start))
+            chunk <<= np.uint64(32)
+            chunk |= np.arange(start, stop, dtype=np.uint64)
+    else:
+        words = _quantize(logistic_sequence(seeds, r=r, n=n)).astype(np.uint64)
+        words <<= np.uint64(32)
+        words |= np.arange(n, dtype=np.uint64)
+    words.sort(axis=-1)
+    return words.astype(np.uint32)  # Keeps the low 32 bits: the indices
+
+def logistic_keystream(x, r=3.99, n=1000, return_sequence=False, method=DEFAULT_PERMUTATION):
+    """ Generate scrambling permutation(s) for one seed or a batch of seeds
+    
+    With the default method, produces the same permutation as logistic_map
+    for the same (x, r, n).
+    
+    Args:
+        x: Seed value, or 1-D array of seeds
+        r: Control parameter, scalar or one value per lane
+        n: Sequence length per lane
+        return_sequence: Also return the raw chaotic sequence
+        method: Permutation generator (see PERMUTATION_METHODS)
+    
+    Returns:
+        Permutation array, or (permutation, sequence) if requested
+    """
+    if method == "argsort":
+        sequence = logistic_sequence(x, r=r, n=n)
+        key = np.argsort(sequence, axis=-1)
+    elif method == "packed":
+        key = packed_permutation(x, r=r, n=n)
+        sequence = logistic_sequence(x, r=r, n=n) if return_sequence else None
+    else:
+        raise ValueError(f"Unknown permutation method {method!r} (expected one of {PERMUTATION_METHODS})")
+    if return_sequence:
+        return key, sequence
+    return key
 
 def logistic_map(x, r=3.99, n=1000):
     """ Generate chaotic sequence using logistic map """
-    sequence = []
-    for _ in range(n):
-        x = r * x * (1 - x)
-        sequence.append(x)
-    return np.argsort(sequence)
-
-def scramble_pixels(data):
-    """ Apply chaotic scrambling to DNA sequence """
-    seed = 0.5  # Fixed seed for consistency
-    key = logistic_map(seed, n=len(data))
-    return np.array(list(data))[key]
-
-def unscramble_pixels(data):
-    """ Unscramble chaotic DNA sequence """
-    seed = 0.5  # Same fixed seed as scrambling
-    key = logistic_map(seed, n=len(data))
+    return logistic_keystream(x, r=r, n=n)
+
+class PermutationCache:
+    """ LRU cache of scrambling permutations and their inverses
+    
+    Entries are keyed by (seed, r, n, method) and evicted least-recently-used first
+    once their combined size exceeds max_bytes. Threads asking for a key that
+    is being built wait for it instead of building it again.
+    """
+    
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+    
+    def get(self, seed=0.5, r=3.99, n=1000, method=DEFAULT_PERMUTATION):
+        """ Return (permutation, inverse permutation) for (seed, r, n, method) """
+        key = (float(seed), float(r), int(n), method)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                building = self._building.get(key)
+                if building is None:
+                    self.misses += 1
+                    building = self._building[key] = threading.Event()
+                    break
+            # Another thread is building this key; re-check once it is done
+            # (and build it here if it failed or was evicted straight away)
+            building.wait()
+        
+        # Build outside the lock so other keys are not blocked meanwhile
+        try:
+            permutation = logistic_keystream(seed, r=r, n=n, method=method)
+            inverse = np.empty_like(permutation)
+            inverse[permutation] = np.arange(n, dtype=permutation.dtype)
+            permutation.flags.writeable = False
+            inverse.flags.writeable = False
+            entry = (permutation, inverse)
+            
+            with self._lock:
+                self._entries[key] = entry
+                self.current_bytes += permutation.nbytes + inverse.nbytes
+                self._evict()
+        finally:
+            with self._lock:
+                del self._building[key]
+            building.set()
+        return entry
+    
+    def _evict(self):
+        """ Drop least recently used entries until under the memory ceiling """
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (permutation, inverse) = self._entries.popitem(last=False)
+            self.current_bytes -= permutation.nbytes + inverse.nbytes
+            self.evictions += 1
+    
+    def resize(self, max_bytes):
+        """ Change the memory ceiling, evicting entries if necessary """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+    
+    def clear(self):
+        """ Remove all entries (counters are kept) """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self):
+        """ Return cache counters as a dictionary """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+# Shared in-process cache used by scramble_pixels / unscramble_pixels
+PERMUTATION_CACHE = PermutationCache()
+
+def configure_permutation_cache(max_bytes):
+    """ Set the memory ceiling of the shared permutation cache """
+    PERMUTATION_CACHE.resize(max_bytes)
+
+def permutation_cache_stats():
+    """ Return hit/miss/eviction counters of the shared permutation cache """
+    return PERMUTATION_CACHE.stats()
+
+def scramble_pixels(data, seed=0.5, r=3.99, cache=None, method=DEFAULT_PERMUTATION, mode="nucleotide", block_size=8):
+    """ Apply chaotic scrambling to a DNA sequence, or to the pixels, rows or blocks of an image
+    
+    Args:
+        data: Nucleotide sequence for "nucleotide" mode, uint8 image array otherwise
+        seed: Logistic map seed
+        r: Logistic map control parameter
+        cache: PermutationCache (default: the shared cache)
+        method: Permutation generator (see PERMUTATION_METHODS)
+        mode: Scrambling unit (see SCRAMBLE_MODES)
+        block_size: Side of the square blocks in "block" mode
+    """
+    cache = PERMUTATION_CACHE if cache is None else cache
+    if mode != "nucleotide":
+        return _permute_units(data, mode, block_size, lambda n: cache.get(seed, r, n, method=method)[0])
+    key, _ = cache.get(seed, r, len(data), method=method)
+    if isinstance(data, str):
+        data = np.array(list(data))
+    return np.asarray(data)[key]
+
+def unscramble_pixels(data, seed=0.5, r=3.99, cache=None, method=DEFAULT_PERMUTATION, mode="nucleotide", block_size=8):
+    """ Unscramble chaotic DNA sequence, or an image scrambled by pixels, rows or blocks """
+    cache = PERMUTATION_CACHE if cache is None else cache
+    if mode != "nucleotide":
+        return _permute_units(data, mode, block_size, lambda n: cache.get(seed, r, n, method=method)[1])
+    _, inverse = cache.get(seed, r, len(data), method=method)
     
     # Convert to array of characters if input is a string
     if isinstance(data, str):
         data_array = np.array(list(data))
     else:
-        data_array = np.array(list(data))
+        data_array = np.asarray(data)
     
-    # Apply unscrambling
-    unscrambled = np.empty_like(data_array)
-    unscrambled[key] = data_array
+    # Apply unscrambling with a single gather through the inverse permutation
+    unscrambled = data_array[inverse]
     
     # Return in original format
     if isinstance(data, str):
@@ -35,6 +297,53 @@ def unscramble_pixels(data):
     else:
         return unscrambled
 
+def _permute_units(image, mode, block_size, permutation_for):
+    """ Gather whole pixels, rows or blocks of an image through a permutation
+    
+    permutation_for(n) returns the index array for n units. In "block"
+    mode, pixels outside the largest area tiled by full blocks are
+    permuted among themselves at pixel granularity.
+    """
+    if mode not in SCRAMBLE_MODES:
+        raise ValueError(f"Unknown scramble mode {mode!r} (expected one of {SCRAMBLE_MODES})")
+    image = np.asarray(image)
+    if image.ndim < 2:
+        raise ValueError(f"{mode.capitalize()} scrambling needs an image array, got shape {image.shape}")
+    if mode == "row":
+        return np.take(image, permutation_for(image.shape[0]), axis=0)
+    
+    height, width = image.shape[:2]
+    pixels = image.reshape(height, width, -1)
+    if mode == "pixel":
+        flat = pixels.reshape(height * width, -1)
+        return np.take(flat, permutation_for(height * width), axis=0).reshape(image.shape)
+    
+    if block_size < 1:
+        raise ValueError(f"Block size must be positive, got {block_size}")
+    rows, cols = height // block_size, width // block_size
+    tiled_height, tiled_width = rows * block_size, cols * block_size
+    channels = pixels.shape[2]
+    result = np.empty_like(pixels)
+    if rows and cols:
+        # (rows, cols, B, B, C) block view -> one unit per block
+        blocks = (pixels[:tiled_height, :tiled_width]
+                  .reshape(rows, block_size, cols, block_size, channels)
+                  .swapaxes(1, 2)
+                  .reshape(rows * cols, block_size, block_size, channels))
+        blocks = np.take(blocks, permutation_for(rows * cols), axis=0)
+        result[:tiled_height, :tiled_width] = (blocks.reshape(rows, cols, block_size, block_size, channels)
+                                               .swapaxes(1, 2)
+                                               .reshape(tiled_height, tiled_width, channels))
+    
+    # Right strip beside the tiled area, then the bottom strip below it
+    right = pixels[:tiled_height, tiled_width:].reshape(-1, channels)
+    bottom = pixels[tiled_height:].reshape(-1, channels)
+    if len(right) + len(bottom):
+        rest = np.take(np.concatenate([right, bottom]), permutation_for(len(right) + len(bottom)), axis=0)
+        result[:tiled_height, tiled_width:] = rest[:len(right)].reshape(tiled_height, width - tiled_width, channels)
+        result[tiled_height:] = rest[len(right):].reshape(height - tiled_height, width, channels)
+    return result.reshape(image.shape)
+
 # If module is run directly, demonstrate chaotic sequence
 if __name__ == "__main__":
     # Generate a small chaotic sequence for demonstration
@@ -0,0 +1,152 @@
+import json
+import mmap
+import os
+import struct
+
+# Versioned binary ciphertext container
+#
+#   prefix:  magic (8s) | version (u16) | flags (u16) | header length (u32)
+#   header:  UTF-8 JSON (shape, dtype, cipher parameters, scrambling, ...);
+#            AES-GCM-STREAM chunks authenticate these exact bytes
+#   chunks:  raw ciphertext chunks, back to back
+#   table:   one (offset u64, length u64) entry per chunk
+#   footer:  table offset (u64) | chunk count (u64) | end magic (8s)
+#
+# Chunks are appended as they are produced and the chunk table is written
+# last, so a container can be written in a single streaming pass. Offsets
+# count from the container's first byte, so a container written into the
+# middle of another stream is read from that slice of it.
+CONTAINER_MAGIC = b"DNACHAOS"
+CONTAINER_END_MAGIC = b"DNACEND\0"
+CONTAINER_VERSION = 1
+CONTAINER_SUFFIX = ".dnac"
+
+_PREFIX = struct.Struct("<8sHHI")
+_TABLE_ENTRY = struct.Struct("<QQ")
+_FOOTER = struct.Struct("<QQ8s")
+
+def encode_header(header):
+    """Serialize a container header to the exact bytes stored (and authenticated) in the container"""
+    return json.dumps(header, sort_keys=True).encode("utf-8")
+
+class ContainerWriter:
+    """Write a ciphertext container chunk by chunk to a path or binary file object"""
+
+    def __init__(self, target, header):
+        self._owns_file = isinstance(target, (str, os.PathLike))
+        self._file = open(target, "wb") if self._owns_file else target
+        self._table = []
+        self._closed = False
+
+        self.header_bytes = encode_header(header)
+        self._file.write(_PREFIX.pack(CONTAINER_MAGIC, CONTAINER_VERSION, 0, len(self.header_bytes)))
+        self._file.write(self.header_bytes)
+        self._offset = _PREFIX.size + len(self.header_bytes)
+
+    def write_chunk(self, data):
+        """Append one ciphertext chunk and return its index"""
+        self._file.write(data)
+        length = len(memoryview(data).cast("B"))
+        self._table.append((self._offset, length))
+        self._offset += length
+        return len(self._table) - 1
+
+    def close(self):
+        """Write the chunk table and footer (and close the file if we opened it)"""
+        if self._closed:
+            return
+        table_offset = self._offset
+        for offset, length in self._table:
+            self._file.write(_TABLE_ENTRY.pack(offset, length))
+        self._file.write(_FOOTER.pack(table_offset, len(self._table), CONTAINER_END_MAGIC))
+        self._closed = True
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._owns_file:
+            self._file.close()
+
+class ContainerReader:
+    """Zero-copy reader over a container file (memory mapped) or an in-memory buffer
+
+    Chunks are returned as memoryview slices of the mapping, so nothing is
+    copied until a caller asks for it.
+    """
+
+    def __init__(self, source):
+        self._mmap = None
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = memoryview(self._mmap)
+        else:
+            self._buffer = memoryview(source).cast("B")
+
+        if len(self._buffer) < _PREFIX.size + _FOOTER.size:
+            raise ValueError("File is too small to be a ciphertext container")
+        magic, self.version, self.flags, header_len = _PREFIX.unpack_from(self._buffer, 0)
+        if magic != CONTAINER_MAGIC:
+            raise ValueError("Not a ciphertext container")
+        if self.version > CONTAINER_VERSION:
+            raise ValueError(f"Unsupported container version {self.version} (max {CONTAINER_VERSION})")
+        self.header_bytes = bytes(self._buffer[_PREFIX.size:_PREFIX.size + header_len])
+        self.header = json.loads(self.header_bytes.decode("utf-8"))
+
+        table_offset, count, end_magic = _FOOTER.unpack_from(self._buffer, len(self._buffer) - _FOOTER.size)
+        if end_magic != CONTAINER_END_MAGIC:
+            raise ValueError("Ciphertext container is truncated (missing footer)")
+        self._table = [_TABLE_ENTRY.unpack_from(self._buffer, table_offset + i * _TABLE_ENTRY.size)
+                       for i in range(count)]
+
+    def __len__(self):
+        return len(self._table)
+
+    def chunk(self, index):
+        """Return chunk `index` as a memoryview (no copy)"""
+        offset, length = self._table[index]
+        return self._buffer[offset:offset + length]
+
+    def __getitem__(self, index):
+        return self.chunk(index)
+
+    def chunks(self):
+        """Iterate over all chunks in order"""
+        for index in range(len(self._table)):
+            yield self.chunk(index)
+
+    def ciphertext_size(self):
+        """Total size of all chunks in bytes"""
+        return sum(length for _, length in self._table)
+
+    def close(self):
+        self._buffer.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A caller still holds a chunk view; the mapping is
+                # released together with the last view instead
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def is_container_file(path):
+    """Check whether a file starts with the container magic"""
+    with open(path, "rb") as f:
+        return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
+def is_container_bytes(data):
+    """Check whether an in-memory buffer starts with the container magic"""
+    return bytes(memoryview(data)[:len(CONTAINER_MAGIC)]) == CONTAINER_MAGIC
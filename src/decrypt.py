@@ -1,74 +1,332 @@
-import cv2
-import numpy as np
+import io
 import os
+import math
 import argparse
-from dna_crypto import dna_to_image
-from hybrid_crypto import decrypt_dna, generate_or_load_key
-from chaos import unscramble_pixels
-from steganography import extract_encrypted_data
+from hybrid_crypto import decrypt_dna, generate_or_load_key, SegmentedCipher
+from steganography import extract_encrypted_bytes
+from container import ContainerReader, is_container_file, is_container_bytes
+from instrumentation import stage, add_instrumentation_arguments, install_from_args
 
-def decrypt_image(encrypted_path=None, shape_path=None, output_path=None, stego_image=None):
+# NumPy, OpenCV and the DNA/chaos modules that need them are imported inside
+# the functions that use them, so `--help` and argument errors stay fast
+
+def decrypt_image(encrypted_path=None, shape_path=None, output_path=None, stego_image=None, key_manager=None,
+                  verbose=False):
     """
     Decrypt an image using the enhanced DNA-Chaos-AES hybrid cryptosystem
     
+    File-based wrapper around decrypt_bytes / decrypt_stego_array.
+    
     Args:
         encrypted_path: Path to the encrypted data file
         shape_path: Path to the file containing original image shape
         output_path: Path to save the decrypted image
         stego_image: Path to steganographic image (if using steganography)
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        verbose: Print progress messages
     
     Returns:
         Path to the decrypted image
     """
+    import cv2
+    import numpy as np
+    
     if output_path is None:
         output_path = "images/decrypted.png"
     
     # Ensure the output directory exists
     output_dir = os.path.dirname(output_path)
-    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(output_dir or ".", exist_ok=True)
     
     # Extract data from steganographic image if provided
     if stego_image is not None:
-        print(f"[1/6] Extracting hidden data from {stego_image}...")
-        extracted_path = "images/extracted_encrypted.npy"
-        extract_encrypted_data(stego_image, output_path=extracted_path)
-        encrypted_path = extracted_path
+        if verbose:
+            print(f"[1/6] Extracting hidden data from {stego_image}...")
+        with stage("load_stego", path=stego_image):
+            stego_array = cv2.imread(stego_image)
+        if stego_array is None:
+            raise ValueError(f"Could not load steganographic image from {stego_image}")
+        decrypted_image = decrypt_stego_array(stego_array, shape_path=shape_path, key_manager=key_manager,
+                                              verbose=verbose)
+    
+    # Ciphertext containers carry their own shape, cipher and band layout
+    elif is_container_file(encrypted_path):
+        return decrypt_container(encrypted_path, output_path=output_path, key_manager=key_manager, verbose=verbose)
+    
+    else:
+        # Legacy format: base64 string in a .npy file next to a separate shape file
+        if verbose:
+            print(f"[2/6] Loading encrypted data from {encrypted_path}...")
+        with stage("load_ciphertext", path=encrypted_path):
+            encrypted_data = np.load(encrypted_path, allow_pickle=True)
+        decrypted_image = decrypt_legacy_array(encrypted_data, load_legacy_shape(shape_path, verbose=verbose),
+                                               key_manager=key_manager, verbose=verbose)
+    
+    # Save decrypted image
+    with stage("write_image", path=output_path):
+        cv2.imwrite(output_path, decrypted_image)
+    
+    return output_path
+
+def decrypt_bytes(data, key_manager=None, workers=None, verbose=False):
+    """
+    Decrypt an in-memory ciphertext container
+    
+    Args:
+        data: Container bytes (bytes, bytearray, memoryview or uint8 array)
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        workers: Threads used to decrypt segments in parallel
+        verbose: Print progress messages
+    
+    Returns:
+        The decrypted image array
+    """
+    with ContainerReader(data) as reader:
+        return decrypt_reader(reader, key_manager=key_manager, workers=workers, verbose=verbose)
+
+def decrypt_stego_array(stego_image, shape_path=None, key_manager=None, workers=None, verbose=False):
+    """
+    Decrypt the ciphertext hidden in an in-memory steganographic image
+    
+    Args:
+        stego_image: uint8 steganographic image array
+        shape_path: Original shape file, only needed for a legacy .npy payload
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        workers: Threads used to decrypt segments in parallel
+        verbose: Print progress messages
     
-    # Load encrypted data
-    print(f"[2/6] Loading encrypted data from {encrypted_path}...")
-    encrypted_data = np.load(encrypted_path, allow_pickle=True)
+    Returns:
+        The decrypted image array
+    """
+    import numpy as np
+    
+    with stage("extract_steganography"):
+        data_bytes = extract_encrypted_bytes(stego_image)
+    if is_container_bytes(data_bytes):
+        return decrypt_bytes(data_bytes, key_manager=key_manager, workers=workers, verbose=verbose)
+    
+    # Legacy payload: a serialized .npy holding the base64 ciphertext
+    encrypted_data = np.load(io.BytesIO(data_bytes), allow_pickle=True)
+    return decrypt_legacy_array(encrypted_data, load_legacy_shape(shape_path, verbose=verbose), key_manager=key_manager,
+                                verbose=verbose)
+
+def load_legacy_shape(shape_path=None, verbose=False):
+    """Load the original image shape stored next to a legacy .npy ciphertext"""
+    import numpy as np
     
-    # Load original shape
     if shape_path is None:
         shape_path = "images/original_shape.npy"
-    print(f"[3/6] Loading original shape from {shape_path}...")
-    original_shape = np.load(shape_path, allow_pickle=True)
+    if verbose:
+        print(f"[3/6] Loading original shape from {shape_path}...")
+    return np.load(shape_path, allow_pickle=True)
+
+def decrypt_legacy_array(encrypted_data, original_shape, key_manager=None, verbose=False):
+    """
+    Decrypt a legacy base64 ciphertext (as stored in the old .npy files)
+    
+    Args:
+        encrypted_data: Base64 ciphertext string (or 0-d array holding it)
+        original_shape: Shape of the original image
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        verbose: Print progress messages
+    
+    Returns:
+        The decrypted image array
+    """
+    from dna_crypto import dna_to_image
+    from chaos import unscramble_pixels
     
     # REORDERED: First decrypt the AES-CBC encrypted data
-    print("[4/6] Decrypting DNA sequence using AES-CBC...")
-    decrypted_dna = decrypt_dna(encrypted_data)
+    if verbose:
+        print("[4/6] Decrypting DNA sequence using AES-CBC...")
+    with stage("decrypt"):
+        decrypted_dna = decrypt_dna(encrypted_data, key_manager=key_manager)
     
     # Then unscramble the decrypted data
-    print("[5/6] Applying chaotic unscrambling...")
-    unscrambled_dna = unscramble_pixels(decrypted_dna)
+    if verbose:
+        print("[5/6] Applying chaotic unscrambling...")
+    with stage("unscramble"):
+        unscrambled_dna = unscramble_pixels(decrypted_dna)
     
     # Convert DNA back to image
-    print("[6/6] Converting DNA back to image...")
-    decrypted_image = dna_to_image(unscrambled_dna, original_shape)
+    if verbose:
+        print("[6/6] Converting DNA back to image...")
+    with stage("dna_decode"):
+        return dna_to_image(unscrambled_dna, original_shape)
+
+def container_cipher(reader, key_manager=None):
+    """
+    Build the SegmentedCipher for an open AES-GCM-STREAM container
     
-    # Save decrypted image
-    cv2.imwrite(output_path, decrypted_image)
+    Every segment authenticates the exact header bytes and is encrypted
+    under a subkey derived from the header's salt; containers that do not
+    declare both are rejected.
+    """
+    cipher_params = reader.header["cipher"]
+    if cipher_params.get("algorithm") != "AES-GCM-STREAM":
+        raise ValueError(f"Unsupported cipher {cipher_params.get('algorithm')}")
+    if cipher_params.get("associated_data") != "header":
+        raise ValueError("Container header is not authenticated (missing \"associated_data\": \"header\")")
+    if "salt" not in cipher_params:
+        raise ValueError("Container has no key-derivation salt")
+    return SegmentedCipher(key_manager=key_manager, base_nonce=bytes.fromhex(cipher_params["base_nonce"]),
+                           salt=bytes.fromhex(cipher_params["salt"]), associated_data=reader.header_bytes)
+
+def read_band_plaintexts(reader, key_manager=None, workers=None):
+    """
+    Yield the decrypted DNA text of each band of a ciphertext container in order
+    
+    Args:
+        reader: Open ContainerReader
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        workers: Threads used to decrypt segments in parallel
+    """
+    header = reader.header
+    shape = header["shape"]
+    band_rows = header["band_rows"]
+    cipher_params = header["cipher"]
+    row_text_bytes = math.prod(shape[1:]) * 4
+    bands = -(-shape[0] // band_rows)
+    
+    # Segments cut the concatenated band texts into fixed-size pieces; decrypt
+    # just the segments covering each band
+    cipher = container_cipher(reader, key_manager=key_manager)
+    segment_size = cipher_params["segment_size"]
+    total = shape[0] * row_text_bytes
+    if len(reader) != max(1, -(-total // segment_size)):
+        raise ValueError(f"Ciphertext container is truncated: {len(reader)} segments for {total} bytes")
+    for index in range(bands):
+        begin = index * band_rows * row_text_bytes
+        end = min((index + 1) * band_rows, shape[0]) * row_text_bytes
+        first = begin // segment_size
+        last = max(first + 1, -(-end // segment_size))
+        plaintext = b"".join(cipher.decrypt(reader, start=first, stop=last, workers=workers))
+        offset = first * segment_size
+        yield plaintext[begin - offset:end - offset]
+
+def decrypt_reader(reader, key_manager=None, workers=None, out=None, verbose=False):
+    """
+    Decrypt an open ciphertext container band by band
+    
+    Each band is decrypted straight from the reader's buffer, so only one
+    band's intermediates are alive at a time; the decrypted image buffer
+    itself is the only full-size allocation, and none when `out` is a
+    memory-mapped array (see utils.ImageWriter).
+    
+    Args:
+        reader: Open ContainerReader
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        workers: Threads used to decrypt segments in parallel
+        out: Array of the container's shape and dtype to decrypt into
+        verbose: Print progress messages
+    
+    Returns:
+        The decrypted image array
+    """
+    import numpy as np
+    from dna_crypto import dna_text_to_codes, dna_codes_to_image
+    from chaos import unscramble_pixels, PermutationCache
+    from utils import iter_bands
+    
+    header = reader.header
+    if header.get("content") == "frames":
+        raise ValueError("This container holds a frame sequence; decrypt it with video.py")
+    shape = tuple(header["shape"])
+    band_rows = header["band_rows"]
+    scramble = header["scramble"]
+    # Containers from before these options scrambled nucleotides with argsort
+    method = scramble.get("method", "argsort")
+    mode = scramble.get("mode", "nucleotide")
+    bands = -(-shape[0] // band_rows)
+    
+    if verbose:
+        print(f"[3/6] Original shape {shape}, {bands} band(s) of {band_rows} rows")
+    if out is None:
+        image = np.empty(shape, dtype=np.dtype(header["dtype"]))
+    elif out.shape != shape or out.dtype != np.dtype(header["dtype"]):
+        raise ValueError(f"Output array is {out.dtype} {out.shape}; the container holds {header['dtype']} {shape}")
+    else:
+        image = out
+    
+    # Single-band containers share the process-wide permutation cache;
+    # streamed ones keep only the current band's permutation
+    cache = None
+    if bands > 1:
+        cache = PermutationCache(max_bytes=band_rows * math.prod(shape[1:]) * 4 * 16)
+    
+    if verbose:
+        print(f"[4/6] Decrypting DNA sequence using {header['cipher']['algorithm']}...")
+        print("[5/6] Applying chaotic unscrambling...")
+        print("[6/6] Converting DNA back to image...")
+    plaintexts = read_band_plaintexts(reader, key_manager=key_manager, workers=workers)
+    for index, (_, band) in enumerate(iter_bands(image, band_rows)):
+        with stage("decrypt", band=index):
+            plaintext = next(plaintexts)
+        if mode == "nucleotide":
+            with stage("unscramble", band=index):
+                codes = dna_text_to_codes(plaintext)
+                del plaintext
+                codes = unscramble_pixels(codes, seed=scramble["seed"], r=scramble["r"], cache=cache, method=method)
+            with stage("dna_decode", band=index):
+                band[...] = dna_codes_to_image(codes, band.shape)
+        else:
+            # Pixels, rows or blocks were permuted before DNA encoding
+            with stage("dna_decode", band=index):
+                scrambled_band = dna_codes_to_image(dna_text_to_codes(plaintext), band.shape)
+                del plaintext
+            with stage("unscramble", band=index):
+                band[...] = unscramble_pixels(scrambled_band, seed=scramble["seed"], r=scramble["r"], cache=cache,
+                                              method=method, mode=mode, block_size=scramble.get("block_size", 8))
+    plaintexts.close()
+    return image
+
+def decrypt_container(encrypted_path, output_path=None, key_manager=None, workers=None, verbose=False):
+    """
+    Decrypt a ciphertext container file
+    
+    The container is memory mapped and decrypted with decrypt_reader.
+    `.npy`, raw pixel and uncompressed TIFF outputs are memory mapped too
+    and filled band by band (see utils.ImageWriter).
+    
+    Args:
+        encrypted_path: Path to the ciphertext container
+        output_path: Path to save the decrypted image
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        workers: Threads used to decrypt segments in parallel
+        verbose: Print progress messages
+    
+    Returns:
+        Path to the decrypted image
+    """
+    from utils import ImageWriter
+    
+    if output_path is None:
+        output_path = "images/decrypted.png"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
     
+    with ContainerReader(encrypted_path) as reader:
+        if verbose:
+            print(f"[2/6] Loading encrypted data from {encrypted_path}...")
+        header = reader.header
+        if header.get("content") == "frames":
+            raise ValueError("This container holds a frame sequence; decrypt it with video.py")
+        with ImageWriter(output_path, header["shape"], header["dtype"]) as writer:
+            decrypt_reader(reader, key_manager=key_manager, workers=workers, out=writer.array, verbose=verbose)
+            # Save decrypted image (flushes a mapped output, encodes any other format)
+            with stage("write_image", path=output_path):
+                writer.close()
     return output_path
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Enhanced DNA-Chaos-AES Image Decryption")
-    parser.add_argument("--encrypted", default="images/encrypted.npy", help="Path to encrypted data file")
-    parser.add_argument("--shape", default="images/original_shape.npy", help="Path to original shape file")
+    parser.add_argument("--encrypted", default="images/encrypted.dnac", help="Path to encrypted data file")
+    parser.add_argument("--shape", default="images/original_shape.npy", help="Path to original shape file (legacy .npy format only)")
     parser.add_argument("--output", default="images/decrypted.png", help="Path to save decrypted image")
     parser.add_argument("--stego", help="Path to steganographic image (if using steganography)")
+    add_instrumentation_arguments(parser)
     
     args = parser.parse_args()
+    install_from_args(args)
     
     try:
         # Ensure AES key is loaded
@@ -79,7 +337,8 @@ if __name__ == "__main__":
             encrypted_path=args.encrypted,
             shape_path=args.shape,
             output_path=args.output,
-            stego_image=args.stego
+            stego_image=args.stego,
+            verbose=True
         )
         
         print(f"[✔] Image Decrypted Successfully & Stored in '{output_path}'")
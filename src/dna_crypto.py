@@ -8,37 +8,75 @@ DNA_ENCODING = {
 # DNA Decoding Table
 DNA_DECODING = {v: k for k, v in DNA_ENCODING.items()}
 
-def image_to_dna(image):
-    """ Convert image to DNA sequence """
-    binary_data = np.unpackbits(image)  # Convert to binary
-    binary_str = "".join(map(str, binary_data))
+# Lookup tables for the packed codec: 2-bit code -> nucleotide byte and back
+NUCLEOTIDES = np.frombuffer("".join(DNA_ENCODING[format(c, "02b")] for c in range(4)).encode("ascii"), dtype=np.uint8)
+NUCLEOTIDE_CODES = np.full(256, 255, dtype=np.uint8)
+NUCLEOTIDE_CODES[NUCLEOTIDES] = np.arange(4, dtype=np.uint8)
+
+# Byte value -> its four 2-bit codes (most significant first), stored as one
+# uint32 per byte so a single gather expands a whole image
+_BYTE_TO_CODES = np.ascontiguousarray(
+    (np.arange(256, dtype=np.uint8)[:, None] >> np.array([6, 4, 2, 0], dtype=np.uint8)) & 3
+).view(np.uint32).reshape(-1)
+
+def image_to_dna_codes(image):
+    """ Convert image bytes to 2-bit nucleotide codes (one code per uint8) """
+    data = np.ascontiguousarray(image, dtype=np.uint8).reshape(-1)
+    return _BYTE_TO_CODES[data].view(np.uint8)
+
+def dna_codes_to_image(codes, shape):
+    """ Pack 2-bit nucleotide codes back into an image of the given shape """
+    codes = np.asarray(codes, dtype=np.uint8).reshape(-1)
+    expected_size = int(np.prod(shape)) * 4  # Expected nucleotides
+    if len(codes) != expected_size:
+        # Handle size mismatch by zero padding or truncating
+        if len(codes) < expected_size:
+            codes = np.concatenate([codes, np.zeros(expected_size - len(codes), dtype=np.uint8)])
+        else:
+            codes = codes[:expected_size]
+    
+    quads = codes.reshape(-1, 4)
+    image = quads[:, 0] << 6
+    image |= quads[:, 1] << 4
+    image |= quads[:, 2] << 2
+    image |= quads[:, 3]
+    return image.reshape(shape)
+
+def dna_codes_to_text(codes, as_bytes=False):
+    """ Render 2-bit nucleotide codes as A/T/C/G text (or ASCII bytes) """
+    text = NUCLEOTIDES[np.asarray(codes, dtype=np.uint8)].tobytes()
+    return text if as_bytes else text.decode("ascii")
 
-    dna_sequence = "".join(DNA_ENCODING[binary_str[i:i+2]] for i in range(0, len(binary_str), 2))
+def dna_text_to_codes(dna_sequence):
+    """ Parse A/T/C/G text, ASCII bytes or a character array into 2-bit codes """
+    if isinstance(dna_sequence, str):
+        raw = np.frombuffer(dna_sequence.encode("ascii"), dtype=np.uint8)
+    elif isinstance(dna_sequence, (bytes, bytearray, memoryview)):
+        raw = np.frombuffer(dna_sequence, dtype=np.uint8)
+    else:
+        array = np.asarray(dna_sequence)
+        if array.dtype.kind == "U":
+            # Array of single characters, e.g. the output of scramble_pixels
+            raw = array.astype("S1").view(np.uint8)
+        else:
+            raw = array.astype(np.uint8)
     
+    codes = NUCLEOTIDE_CODES[raw]
+    if codes.size and codes.max() > 3:
+        raise ValueError("DNA sequence contains characters other than A, T, C and G")
+    return codes
+
+def image_to_dna(image):
+    """ Convert image to DNA sequence """
+    dna_sequence = dna_codes_to_text(image_to_dna_codes(image))
     return dna_sequence, image.shape
 
 def dna_to_image(dna_sequence, shape):
     """ Convert DNA sequence back to image """
-    binary_str = "".join(DNA_DECODING[nucleotide] for nucleotide in dna_sequence)
-    
-    binary_array = np.array(list(map(int, binary_str)), dtype=np.uint8)
-    
-    expected_size = np.prod(shape) * 8  # Expected bits
-    if len(binary_array) != expected_size:
-        # Handle size mismatch
-        if len(binary_array) < expected_size:
-            # Pad with zeros
-            padding = np.zeros(expected_size - len(binary_array), dtype=np.uint8)
-            binary_array = np.concatenate([binary_array, padding])
-        else:
-            # Truncate
-            binary_array = binary_array[:expected_size]
-
-    image = np.packbits(binary_array)  # Convert back to bytes
-    return image.reshape(shape)
+    return dna_codes_to_image(dna_text_to_codes(dna_sequence), shape)
 
 # If module is run directly, print out encoding table
 if __name__ == "__main__":
     print("[ℹ] Using fixed DNA encoding scheme:")
     for binary, nucleotide in DNA_ENCODING.items():
-        print(f"  {binary} -> {nucleotide}")
\ No newline at end of file
+        print(f"  {binary} -> {nucleotide}")
@@ -1,64 +1,484 @@
-import cv2
-import numpy as np
 import os
+import io
+import sys
+import glob
+import json
+import math
+import time
 import argparse
-from dna_crypto import image_to_dna
-from hybrid_crypto import encrypt_dna, generate_or_load_key
-from chaos import scramble_pixels
-from steganography import hide_encrypted_data
+from hybrid_crypto import SegmentedCipher, generate_or_load_key, KEY_SIZE, IV_SIZE, TAG_SIZE, SEGMENT_SIZE
+from steganography import STEGO_BITS_PER_CHANNEL
+from container import ContainerWriter, ContainerReader, CONTAINER_SUFFIX, encode_header
+from instrumentation import stage, add_instrumentation_arguments, install_from_args
 
-def encrypt_image(image_path, output_dir="images", use_steganography=False, cover_image=None):
+# NumPy, OpenCV and the DNA/chaos modules that need them are imported inside
+# the functions that use them, so `--help` and argument errors stay fast
+
+# Approximate peak working memory per input byte of a band in streaming mode:
+# 4 nucleotide codes, their scrambled copy, the DNA text and the ciphertext
+# (16 bytes), the float64 chaotic sequence (32), the int64 argsort key and
+# its cached inverse (64), plus argsort temporaries
+STREAM_BYTES_PER_INPUT_BYTE = 160
+
+# File extensions picked up when a batch source is a directory
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+def encrypt_array(image, key_manager=None, segment_size=SEGMENT_SIZE, workers=None, seed=0.5, r=3.99, base_nonce=None,
+                  permutation="argsort", scramble_mode="nucleotide", block_size=8, salt=None, verbose=False):
+    """
+    Encrypt an in-memory image into ciphertext container bytes
+    
+    Args:
+        image: uint8 image array (e.g. a decoded frame)
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        segment_size: Plaintext bytes per independently authenticated AES-GCM segment
+        workers: Threads used to encrypt segments in parallel (default: Python's default)
+        seed: Logistic map seed used for scrambling
+        r: Logistic map control parameter used for scrambling
+        base_nonce: Fixed base nonce (default: random). Reusing one with the same key
+            and salt breaks AES-GCM security; only for reproducible analysis
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES)
+        block_size: Block side for the "block" scramble mode
+        salt: Fixed subkey salt (default: random; same caveat as base_nonce)
+        verbose: Print progress messages
+    
+    Returns:
+        The ciphertext container as bytes
+    """
+    buffer = io.BytesIO()
+    write_encrypted_array(image, buffer, key_manager=key_manager, segment_size=segment_size, workers=workers,
+                          seed=seed, r=r, base_nonce=base_nonce, permutation=permutation,
+                          scramble_mode=scramble_mode, block_size=block_size, salt=salt, verbose=verbose)
+    return buffer.getvalue()
+
+def write_encrypted_array(image, target, key_manager=None, segment_size=SEGMENT_SIZE, workers=None, seed=0.5, r=3.99,
+                          base_nonce=None, permutation="argsort", scramble_mode="nucleotide", block_size=8, salt=None,
+                          verbose=False):
+    """
+    Encrypt an in-memory image into a ciphertext container
+    
+    Args:
+        image: uint8 image array
+        target: Path or binary file object the container is written to
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        segment_size: Plaintext bytes per independently authenticated AES-GCM segment
+        workers: Threads used to encrypt segments in parallel (default: Python's default)
+        seed: Logistic map seed used for scrambling
+        r: Logistic map control parameter used for scrambling
+        base_nonce: Fixed base nonce (default: random; see encrypt_array)
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES)
+        block_size: Block side for the "block" scramble mode
+        salt: Fixed subkey salt (default: random; see encrypt_array)
+        verbose: Print progress messages
+    
+    Returns:
+        The container header
+    """
+    import numpy as np
+    from dna_crypto import image_to_dna_codes, dna_codes_to_text
+    from chaos import scramble_pixels
+    
+    image = np.ascontiguousarray(image)
+    if image.dtype != np.uint8:
+        raise ValueError(f"Expected a uint8 image, got {image.dtype}")
+    
+    if scramble_mode == "nucleotide":
+        # Convert image to DNA sequence
+        if verbose:
+            print("[2/5] Converting image to DNA sequence...")
+        with stage("dna_encode", bytes=image.nbytes):
+            dna_codes = image_to_dna_codes(image)
+        
+        # Apply chaotic scrambling before encryption
+        if verbose:
+            print("[3/5] Applying chaotic scrambling...")
+        with stage("scramble", nucleotides=len(dna_codes)):
+            scrambled_dna = scramble_pixels(dna_codes, seed=seed, r=r, method=permutation)
+    else:
+        # Permute whole pixels, rows or blocks of the uint8 image, then DNA encode
+        if verbose:
+            print(f"[2/5] Applying chaotic {scramble_mode} scrambling...")
+        with stage("scramble", mode=scramble_mode):
+            scrambled = scramble_pixels(image, seed=seed, r=r, method=permutation, mode=scramble_mode,
+                                        block_size=block_size)
+        if verbose:
+            print("[3/5] Converting image to DNA sequence...")
+        with stage("dna_encode", bytes=image.nbytes):
+            scrambled_dna = image_to_dna_codes(scrambled)
+        del scrambled
+    
+    # The header (shape, cipher and scrambling parameters) is authenticated by every segment
+    cipher = SegmentedCipher(key_manager=key_manager, base_nonce=base_nonce, salt=salt)
+    header = container_header(image, band_rows=image.shape[0], cipher=cipher, segment_size=segment_size, seed=seed, r=r,
+                              permutation=permutation, scramble_mode=scramble_mode, block_size=block_size)
+    cipher.associated_data = encode_header(header)
+    
+    # Encrypt scrambled DNA sequence
+    if verbose:
+        print("[4/5] Encrypting DNA sequence using segmented AES-GCM...")
+    with stage("encrypt", bytes=len(scrambled_dna)):
+        segments = cipher.encrypt(dna_codes_to_text(scrambled_dna, as_bytes=True), segment_size=segment_size, workers=workers)
+    
+    # Save encrypted segments with their header
+    with stage("write_container"):
+        with ContainerWriter(target, header) as writer:
+            for segment in segments:
+                writer.write_chunk(segment)
+    return header
+
+def encrypt_image(image_path, output_dir="images", use_steganography=False, cover_image=None, key_manager=None,
+                  output_name="encrypted", segment_size=SEGMENT_SIZE, workers=None, stego_bits=1, permutation="argsort",
+                  scramble_mode="nucleotide", block_size=8, raw_shape=None, raw_dtype="uint8", verbose=False):
     """
     Encrypt an image using the enhanced DNA-Chaos-AES hybrid cryptosystem
     
+    File-based wrapper around write_encrypted_array.
+    
     Args:
         image_path: Path to the input image
         output_dir: Directory to save encrypted outputs
         use_steganography: Whether to hide the encrypted data in a cover image
         cover_image: Path to cover image for steganography (optional)
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        output_name: Base file name of the outputs (without extension)
+        segment_size: Plaintext bytes per independently authenticated AES-GCM segment
+        workers: Threads used to encrypt segments in parallel (default: Python's default)
+        stego_bits: Low bits per cover channel value used for the hidden payload (1-4)
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES)
+        block_size: Block side for the "block" scramble mode
+        raw_shape: Shape of a raw pixel dump (`.raw`/`.bin`)
+        raw_dtype: Element type of a raw pixel dump
+        verbose: Print progress messages
     
     Returns:
         Path to the encrypted data or steganographic image
     """
+    from utils import open_image
+    
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
     # Load image
-    print(f"[1/5] Loading image from {image_path}...")
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError(f"Could not load image from {image_path}")
+    if verbose:
+        print(f"[1/5] Loading image from {image_path}...")
+    with stage("load_image", path=image_path):
+        image = open_image(image_path, shape=raw_shape, dtype=raw_dtype)
     
-    # Convert image to DNA sequence
-    print("[2/5] Converting image to DNA sequence...")
-    dna_sequence, original_shape = image_to_dna(image)
+    encrypted_path = os.path.join(output_dir, output_name + CONTAINER_SUFFIX)
+    write_encrypted_array(image, encrypted_path, key_manager=key_manager, segment_size=segment_size, workers=workers,
+                          permutation=permutation, scramble_mode=scramble_mode, block_size=block_size, verbose=verbose)
+    if verbose:
+        print(f"[✔] Encrypted data saved to {encrypted_path}")
     
-    # Apply chaotic scrambling before encryption
-    print("[3/5] Applying chaotic scrambling...")
-    scrambled_dna = scramble_pixels(dna_sequence)
+    # Apply steganography if requested
+    if use_steganography:
+        if verbose:
+            print("[5/5] Hiding encrypted data using steganography...")
+        from steganography import hide_encrypted_data
+        stego_name = "stego_image" if output_name == "encrypted" else f"{output_name}_stego"
+        stego_path = os.path.join(output_dir, stego_name + ".png")
+        with stage("steganography", path=stego_path):
+            hide_encrypted_data(encrypted_path, cover_image_path=cover_image, output_path=stego_path,
+                                bits_per_channel=stego_bits, verbose=verbose)
+        return stego_path
+    else:
+        if verbose:
+            print("[5/5] Skipping steganography (not requested)")
+        return encrypted_path
+
+def container_header(image, band_rows, cipher, segment_size, seed=0.5, r=3.99, permutation="argsort",
+                     scramble_mode="nucleotide", block_size=8):
+    """
+    Build the ciphertext container header for an encrypted image
     
-    # Encrypt scrambled DNA sequence
-    print("[4/5] Encrypting DNA sequence using AES-CBC...")
-    encrypted_dna = encrypt_dna(scrambled_dna)
+    Args:
+        image: The image being encrypted
+        band_rows: Rows per independently scrambled band
+        cipher: SegmentedCipher the chunks are encrypted with
+        segment_size: Plaintext bytes per segment (one container chunk each)
+        seed: Logistic map seed used for scrambling
+        r: Logistic map control parameter used for scrambling
+        permutation: Scrambling permutation generator
+        scramble_mode: Scrambling unit
+        block_size: Block side for the "block" scramble mode
     
-    # Save encrypted data and original shape
-    encrypted_path = os.path.join(output_dir, "encrypted.npy")
-    shape_path = os.path.join(output_dir, "original_shape.npy")
+    Returns:
+        Header dictionary
+    """
+    scramble = {"seed": seed, "r": r, "method": permutation, "mode": scramble_mode}
+    if scramble_mode == "block":
+        scramble["block_size"] = int(block_size)
+    return {
+        "shape": list(image.shape),
+        "dtype": str(image.dtype),
+        "band_rows": int(band_rows),
+        "encoding": "dna-text",
+        "scramble": scramble,
+        "cipher": {
+            "algorithm": "AES-GCM-STREAM",
+            "key_bits": KEY_SIZE * 8,
+            "nonce_size": IV_SIZE,
+            "tag_size": TAG_SIZE,
+            "segment_size": int(segment_size),
+            "base_nonce": cipher.base_nonce.hex(),
+            "key_derivation": "HKDF-SHA256",
+            "salt": cipher.salt.hex(),
+            # Segments authenticate the serialized header as associated data
+            "associated_data": "header",
+        },
+    }
+
+def plan_band_rows(image_shape, memory_budget):
+    """
+    Choose how many image rows to process per band in streaming mode
     
-    np.save(encrypted_path, encrypted_dna)
-    np.save(shape_path, original_shape)
+    Args:
+        image_shape: Shape of the uint8 image
+        memory_budget: Peak working-memory budget in bytes
     
-    print(f"[✔] Encrypted data saved to {encrypted_path}")
+    Returns:
+        Number of rows per band
+    """
+    row_bytes = math.prod(image_shape[1:])
+    band_rows = memory_budget // max(row_bytes * STREAM_BYTES_PER_INPUT_BYTE, 1)
+    if band_rows < 1:
+        raise ValueError(f"Memory budget of {memory_budget} bytes is too small for a single image row "
+                         f"(needs {row_bytes * STREAM_BYTES_PER_INPUT_BYTE} bytes)")
+    return int(min(band_rows, image_shape[0]))
+
+def encrypt_array_streaming(image, target, memory_budget=64 * 1024 * 1024, seed=0.5, r=3.99, key_manager=None,
+                            permutation="argsort", scramble_mode="nucleotide", block_size=8, verbose=False):
+    """
+    Encrypt an image array band by band within a bounded working-memory budget
     
-    # Apply steganography if requested
-    if use_steganography:
-        print("[5/5] Hiding encrypted data using steganography...")
-        stego_path = os.path.join(output_dir, "stego_image.png")
-        hide_encrypted_data(encrypted_path, cover_image_path=cover_image, output_path=stego_path)
-        return stego_path
+    Each band of rows is DNA encoded, chaotically scrambled and encrypted
+    as one AES-GCM segment, so only one band's intermediates are alive at a
+    time. Bands are taken as views, so a memory-mapped image (see
+    utils.open_image) is read from disk one band at a time and never has
+    to fit in RAM.
+    
+    Args:
+        image: uint8 image array or np.memmap
+        target: Path or binary file object the container is written to
+        memory_budget: Peak working-memory budget in bytes (excluding an in-memory image); in
+            "block" mode bands are at least one block high, even if that exceeds the budget
+        seed: Logistic map seed used for scrambling
+        r: Logistic map control parameter used for scrambling
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES); each band is scrambled on its own
+        block_size: Block side for the "block" scramble mode
+        verbose: Print progress messages
+    
+    Returns:
+        The container target
+    """
+    import numpy as np
+    from dna_crypto import image_to_dna_codes, dna_codes_to_text
+    from chaos import scramble_pixels, PermutationCache
+    from utils import iter_bands
+    
+    if image.dtype != np.uint8:
+        raise ValueError(f"Expected a uint8 image, got {image.dtype}")
+    band_rows = plan_band_rows(image.shape, memory_budget)
+    if scramble_mode == "block" and band_rows < image.shape[0]:
+        if band_rows < block_size:
+            # Bands shorter than a block would hold no whole block and silently fall back to pixel scrambling
+            band_rows = min(block_size, image.shape[0])
+            needed = band_rows * math.prod(image.shape[1:]) * STREAM_BYTES_PER_INPUT_BYTE
+            if verbose:
+                print(f"[!] Memory budget of {memory_budget / 2**20:.1f} MB is too small for {block_size}-row blocks; "
+                      f"exceeding it with bands of {band_rows} rows (about {needed / 2**20:.1f} MB)")
+        else:
+            # Whole blocks per band, so only the last band has a pixel-scrambled remainder
+            band_rows -= band_rows % block_size
+    band_nucleotides = band_rows * math.prod(image.shape[1:]) * 4
+    if verbose:
+        print(f"[2/3] Streaming {image.shape[0]} rows in bands of {band_rows}...")
+    
+    # Keep only the current band's permutation cached
+    cache = PermutationCache(max_bytes=band_nucleotides * 16) if band_rows < image.shape[0] else None
+    
+    # Each band is exactly one segment, so segment_size is the band's DNA text size
+    cipher = SegmentedCipher(key_manager=key_manager)
+    bands = -(-image.shape[0] // band_rows)
+    header = container_header(image, band_rows, cipher=cipher, segment_size=band_nucleotides, seed=seed, r=r,
+                              permutation=permutation, scramble_mode=scramble_mode, block_size=block_size)
+    
+    with ContainerWriter(target, header) as writer:
+        cipher.associated_data = writer.header_bytes
+        for index, (_, band) in enumerate(iter_bands(image, band_rows)):
+            if scramble_mode == "nucleotide":
+                with stage("dna_encode", band=index):
+                    codes = image_to_dna_codes(band)
+                with stage("scramble", band=index):
+                    scrambled = scramble_pixels(codes, seed=seed, r=r, cache=cache, method=permutation)
+                del codes
+            else:
+                with stage("scramble", band=index):
+                    scrambled_band = scramble_pixels(np.ascontiguousarray(band), seed=seed, r=r, cache=cache,
+                                                     method=permutation, mode=scramble_mode, block_size=block_size)
+                with stage("dna_encode", band=index):
+                    scrambled = image_to_dna_codes(scrambled_band)
+                del scrambled_band
+            with stage("encrypt", band=index):
+                segment = cipher.encrypt_segment(index, dna_codes_to_text(scrambled, as_bytes=True),
+                                                 last=index == bands - 1)
+            with stage("write_container", band=index):
+                writer.write_chunk(segment)
+    return target
+
+def encrypt_image_streaming(image_path, output_dir="images", memory_budget=64 * 1024 * 1024, seed=0.5, r=3.99,
+                            key_manager=None, permutation="argsort", scramble_mode="nucleotide", block_size=8,
+                            raw_shape=None, raw_dtype="uint8", verbose=False):
+    """
+    Encrypt an image file band by band within a bounded working-memory budget
+    
+    File-based wrapper around encrypt_array_streaming. `.npy` files, raw
+    pixel dumps and uncompressed TIFFs are memory mapped, so the budget
+    covers the whole process; other formats are decoded into RAM first.
+    
+    Args:
+        image_path: Path to the input image
+        output_dir: Directory to save the ciphertext container
+        memory_budget: Peak working-memory budget in bytes (excluding a decoded image)
+        seed: Logistic map seed used for scrambling
+        r: Logistic map control parameter used for scrambling
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES); each band is scrambled on its own
+        block_size: Block side for the "block" scramble mode
+        raw_shape: Shape of a raw pixel dump (`.raw`/`.bin`)
+        raw_dtype: Element type of a raw pixel dump
+        verbose: Print progress messages
+    
+    Returns:
+        Path to the ciphertext container
+    """
+    from utils import open_image
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if verbose:
+        print(f"[1/3] Loading image from {image_path}...")
+    with stage("load_image", path=image_path):
+        image = open_image(image_path, shape=raw_shape, dtype=raw_dtype)
+    
+    encrypted_path = os.path.join(output_dir, "encrypted" + CONTAINER_SUFFIX)
+    encrypt_array_streaming(image, encrypted_path, memory_budget=memory_budget, seed=seed, r=r,
+                            key_manager=key_manager, permutation=permutation, scramble_mode=scramble_mode,
+                            block_size=block_size, verbose=verbose)
+    if verbose:
+        print(f"[3/3] Encrypted data saved to {encrypted_path}")
+    return encrypted_path
+
+def collect_batch_inputs(source):
+    """
+    Resolve a batch source (directory or glob pattern) to a sorted list of image paths
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)
+                 if name.lower().endswith(IMAGE_EXTENSIONS)]
     else:
-        print("[5/5] Skipping steganography (not requested)")
-        return encrypted_path
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+def unique_output_names(paths):
+    """
+    Derive a unique output base name for every input path
+    
+    Names come from the file stem; repeated stems get a numeric suffix.
+    """
+    names = []
+    seen = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = seen.get(stem, 0)
+        seen[stem] = count + 1
+        names.append(stem if count == 0 else f"{stem}_{count}")
+    return names
+
+def _encrypt_batch_item(image_path, output_dir, output_name, permutation="argsort", scramble_mode="nucleotide",
+                        block_size=8):
+    """Encrypt one batch item in a worker process and report its timing"""
+    start = time.perf_counter()
+    result = {"input": image_path, "output": None, "bytes": 0, "seconds": 0.0, "error": None}
+    try:
+        result["output"] = encrypt_image(image_path, output_dir=output_dir, output_name=output_name,
+                                         permutation=permutation, scramble_mode=scramble_mode, block_size=block_size)
+        with ContainerReader(result["output"]) as reader:
+            result["bytes"] = math.prod(reader.header["shape"])
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def encrypt_batch(image_paths, output_dir="images", workers=None, manifest_path=None, permutation="argsort",
+                  scramble_mode="nucleotide", block_size=8, verbose=False):
+    """
+    Encrypt many images across a process pool
+    
+    Args:
+        image_paths: Paths of the images to encrypt
+        output_dir: Directory to save the ciphertext containers
+        workers: Number of worker processes (default: CPU count)
+        manifest_path: Where to write the JSON manifest (default: <output_dir>/manifest.json)
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES)
+        block_size: Block side for the "block" scramble mode
+        verbose: Print a line per image and the aggregate throughput
+    
+    Returns:
+        Manifest dictionary with per-file results and aggregate throughput
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    os.makedirs(output_dir, exist_ok=True)
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, "manifest.json")
+    
+    names = unique_output_names(image_paths)
+    files = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_encrypt_batch_item, path, output_dir, name, permutation, scramble_mode, block_size)
+                   for path, name in zip(image_paths, names)]
+        for future in as_completed(futures):
+            result = future.result()
+            seconds = result["seconds"]
+            result["mb_per_s"] = result["bytes"] / 1e6 / seconds if seconds > 0 else 0.0
+            files.append(result)
+            if not verbose:
+                continue
+            if result["error"]:
+                print(f"[✘] {result['input']}: {result['error']}")
+            else:
+                print(f"[✔] {result['input']} -> {result['output']} "
+                      f"({seconds:.3f}s, {result['mb_per_s']:.2f} MB/s)")
+    wall = time.perf_counter() - start
+    
+    succeeded = [f for f in files if not f["error"]]
+    total_bytes = sum(f["bytes"] for f in succeeded)
+    summary = {
+        "images": len(succeeded),
+        "failed": len(files) - len(succeeded),
+        "workers": workers or os.cpu_count(),
+        "wall_seconds": wall,
+        "images_per_s": len(succeeded) / wall if wall > 0 else 0.0,
+        "mb_per_s": total_bytes / 1e6 / wall if wall > 0 else 0.0,
+    }
+    manifest = {"files": sorted(files, key=lambda f: f["input"]), "summary": summary}
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+    
+    if verbose:
+        print(f"[ℹ] {summary['images']} image(s) encrypted, {summary['failed']} failed in {wall:.2f}s "
+              f"({summary['images_per_s']:.2f} images/s, {summary['mb_per_s']:.2f} MB/s)")
+        print(f"[ℹ] Manifest written to {manifest_path}")
+    return manifest
 
 def setup_crypto_environment():
     """
@@ -78,20 +498,67 @@ if __name__ == "__main__":
     parser.add_argument("--output-dir", default="images", help="Directory to save encrypted outputs")
     parser.add_argument("--steganography", action="store_true", help="Hide encrypted data in a cover image")
     parser.add_argument("--cover", help="Path to cover image for steganography")
+    parser.add_argument("--stego-bits", type=int, default=1, choices=STEGO_BITS_PER_CHANNEL,
+                        help="Low bits per cover channel value used for the hidden payload")
+    parser.add_argument("--permutation", choices=("argsort", "packed"), default="argsort",
+                        help="Scrambling permutation generator (packed uses less memory on large images)")
+    parser.add_argument("--scramble", choices=("nucleotide", "pixel", "row", "block"), default="nucleotide",
+                        help="Scrambling unit: DNA nucleotides, or whole pixels, rows or blocks of the image")
+    parser.add_argument("--block-size", type=int, default=8, help="Block side for --scramble block")
+    parser.add_argument("--raw-shape", type=int, nargs="+", metavar="DIM",
+                        help="Shape of a raw pixel input (.raw/.bin), e.g. HEIGHT WIDTH CHANNELS")
+    parser.add_argument("--raw-dtype", default="uint8", help="Element type of a raw pixel input")
+    parser.add_argument("--stream", action="store_true", help="Encrypt in row bands within a bounded memory budget")
+    parser.add_argument("--memory-budget", type=int, default=64, help="Streaming mode peak working memory in MB")
+    parser.add_argument("--batch", help="Encrypt every image in a directory or matching a glob pattern")
+    parser.add_argument("--workers", type=int, help="Batch mode worker processes (default: CPU count)")
+    parser.add_argument("--manifest", help="Batch mode manifest path (default: <output-dir>/manifest.json)")
+    add_instrumentation_arguments(parser)
     
     args = parser.parse_args()
+    install_from_args(args)
     
     try:
         # Setup cryptographic environment (generate keys/parameters if needed)
         setup_crypto_environment()
         
-        # Encrypt the image
-        output_path = encrypt_image(
-            args.image,
-            output_dir=args.output_dir,
-            use_steganography=args.steganography,
-            cover_image=args.cover
-        )
+        # Encrypt the image(s)
+        if args.batch:
+            image_paths = collect_batch_inputs(args.batch)
+            if not image_paths:
+                raise ValueError(f"No images found for batch source {args.batch}")
+            manifest = encrypt_batch(image_paths, output_dir=args.output_dir, workers=args.workers,
+                                     manifest_path=args.manifest, permutation=args.permutation,
+                                     scramble_mode=args.scramble, block_size=args.block_size, verbose=True)
+            sys.exit(1 if manifest["summary"]["failed"] else 0)
+        elif args.stream:
+            if args.steganography:
+                raise ValueError("Steganography is not supported in streaming mode")
+            output_path = encrypt_image_streaming(
+                args.image,
+                output_dir=args.output_dir,
+                memory_budget=args.memory_budget * 1024 * 1024,
+                permutation=args.permutation,
+                scramble_mode=args.scramble,
+                block_size=args.block_size,
+                raw_shape=args.raw_shape,
+                raw_dtype=args.raw_dtype,
+                verbose=True
+            )
+        else:
+            output_path = encrypt_image(
+                args.image,
+                output_dir=args.output_dir,
+                use_steganography=args.steganography,
+                cover_image=args.cover,
+                stego_bits=args.stego_bits,
+                permutation=args.permutation,
+                scramble_mode=args.scramble,
+                block_size=args.block_size,
+                raw_shape=args.raw_shape,
+                raw_dtype=args.raw_dtype,
+                verbose=True
+            )
         
         print(f"[✔] Image Encrypted Successfully!")
         if args.steganography:
@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Bytes read per hash update; large enough that hashlib (which releases the
+# GIL for big updates) dominates the per-chunk Python overhead
+HASH_CHUNK_SIZE = 1 << 20
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE, algorithm="sha256"):
+    """Hash a file in fixed-size chunks and return the hex digest"""
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+class HashCache:
+    """
+    File digests keyed by (path, size, mtime_ns), optionally persisted as JSON
+
+    A file whose size or modification time changed is hashed again.
+
+    Args:
+        path: JSON file the cache is loaded from and saved to (None: memory only)
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self._entries = {key: tuple(value) for key, value in json.load(f).items()}
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    def get(self, path, stat=None):
+        """Return the cached digest of an unchanged file, or None"""
+        stat = stat or os.stat(path)
+        entry = self._entries.get(self._key(path))
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def put(self, path, stat, digest):
+        with self._lock:
+            self._entries[self._key(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+            self._dirty = True
+
+    def save(self):
+        """Write the cache to its JSON file (if it has one and changed)"""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+class HashingService:
+    """
+    Hash many files concurrently with a thread pool and a digest cache
+
+    Args:
+        cache: HashCache to consult and fill (default: a new in-memory cache)
+        workers: Hashing threads (default: Python's ThreadPoolExecutor default)
+        chunk_size: Bytes read per hash update
+    """
+
+    def __init__(self, cache=None, workers=None, chunk_size=HASH_CHUNK_SIZE):
+        self.cache = cache if cache is not None else HashCache()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hash(self, path):
+        """Return the hex SHA-256 digest of one file, from the cache when unchanged"""
+        stat = os.stat(path)
+        digest = self.cache.get(path, stat)
+        with self._lock:
+            if digest is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if digest is not None:
+            return digest
+        digest = hash_file(path, chunk_size=self.chunk_size)
+        # Only cache if the file did not change while it was being read
+        after = os.stat(path)
+        if (after.st_size, after.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            self.cache.put(path, stat, digest)
+        return digest
+
+    def hash_many(self, paths):
+        """
+        Hash files concurrently
+
+        Returns:
+            Dictionary mapping each path to its hex digest, in input order
+        """
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            digests = list(executor.map(self.hash, paths))
+        return dict(zip(paths, digests))
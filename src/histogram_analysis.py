@@ -1,38 +1,15 @@
 import cv2
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-from skimage.filters import sobel
-from scipy.stats import pearsonr
+from container import ContainerReader
+from metrics import shannon_entropy, local_entropy_maps
 
-def shannon_entropy(image):
-    """
-    Calculate Shannon entropy of an image.
-    
-    Args:
-        image: Input image (grayscale or color)
-        
-    Returns:
-        Shannon entropy value
-    """
-    # Ensure image is flattened and in uint8 format
-    image_array = np.asarray(image).astype(np.uint8).flatten()
-    
-    # Calculate histogram
-    histogram, _ = np.histogram(image_array, bins=256, range=(0, 256))
-    
-    # Normalize histogram to get probabilities
-    probabilities = histogram / np.sum(histogram)
-    
-    # Filter out zero probabilities to avoid log(0)
-    probabilities = probabilities[probabilities > 0]
-    
-    # Calculate entropy
-    entropy = -np.sum(probabilities * np.log2(probabilities))
-    
-    return entropy
+# matplotlib, scikit-image and SciPy are imported by the functions that plot
+# or use them; the numbers alone are available headless from metrics.py
 
 def plot_histograms_and_images(original_img, decrypted_img, encrypted_bytes, original_filename="histograminput.jpg", encrypted_filename="histogramencrypted.png", comparison_filename="comparison.png"):
     """Generates and saves histograms, side-by-side images, difference image, and additional visualizations."""
+    import matplotlib.pyplot as plt
 
     # --- Calculate Entropies ---
     original_entropy = shannon_entropy(original_img)
@@ -100,7 +77,7 @@ def plot_histograms_and_images(original_img, decrypted_img, encrypted_bytes, ori
     edge_detection_comparison(original_gray, encrypted_2d, "edge_detection_comparison.png")
     
     # Create local entropy maps
-    generate_entropy_maps(original_gray, encrypted_2d, "entropy_maps.png")
+    generate_entropy_maps(original_img, encrypted_bytes.astype(np.uint8), "entropy_maps.png")
 
     # --- Side-by-Side and Difference Image ---
     if decrypted_img is not None:
@@ -177,6 +154,9 @@ def correlation_analysis(original_img, encrypted_img, filename):
         encrypted_img: Encrypted data (reshaped for visualization)
         filename: Output filename for the visualization
     """
+    import matplotlib.pyplot as plt
+    from scipy.stats import pearsonr
+    
     # Setup figure
     fig, axes = plt.subplots(2, 3, figsize=(18, 12))
     directions = ["Horizontal", "Vertical", "Diagonal"]
@@ -302,6 +282,8 @@ def bit_plane_visualization(image, filename):
         image: Grayscale image
         filename: Output filename
     """
+    import matplotlib.pyplot as plt
+    
     # Ensure image is grayscale
     if len(image.shape) > 2:
         img = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -338,6 +320,9 @@ def edge_detection_comparison(original_img, encrypted_img, filename):
         encrypted_img: Encrypted data (reshaped for visualization)
         filename: Output filename
     """
+    import matplotlib.pyplot as plt
+    from skimage.filters import sobel
+    
     # Create figure
     fig, axes = plt.subplots(2, 2, figsize=(12, 12))
     
@@ -369,23 +354,23 @@ def edge_detection_comparison(original_img, encrypted_img, filename):
     plt.close(fig)
     print(f"[✔] Edge detection comparison saved to {filename}")
 
-def generate_entropy_maps(original_img, encrypted_img, filename):
+def generate_entropy_maps(original_img, encrypted_img, filename, window=9):
     """
     Generate local entropy maps for original and encrypted images
     
+    Maps of multi-channel data are averaged over the channels.
+    
     Args:
-        original_img: Original grayscale image
-        encrypted_img: Encrypted data (reshaped for visualization)
+        original_img: Original image (grayscale or color)
+        encrypted_img: Encrypted data (flat bytes are shown as the largest square)
         filename: Output filename
+        window: Side length of the square entropy window
     """
-    def local_entropy(img, win_size=9):
-        """Calculate entropy in local windows"""
-        from skimage.filters.rank import entropy
-        from skimage.morphology import disk
-        
-        # Ensure uint8 type for entropy calculation
-        img_uint8 = img.astype(np.uint8)
-        return entropy(img_uint8, disk(win_size//2))
+    import matplotlib.pyplot as plt
+    
+    def local_entropy(img):
+        """Calculate entropy in local windows, averaged over channels"""
+        return np.mean(local_entropy_maps(np.asarray(img).astype(np.uint8), window=window), axis=0)
     
     # Create figure
     fig, axes = plt.subplots(1, 2, figsize=(16, 8))
@@ -397,20 +382,7 @@ def generate_entropy_maps(original_img, encrypted_img, filename):
     axes[0].axis('off')
     fig.colorbar(im1, ax=axes[0], fraction=0.046, pad=0.04)
     
-    # Try to resize encrypted to similar size for better visualization
-    if encrypted_img.size != original_img.size:
-        try:
-            # This is only for visualization - might not be perfect size match
-            sample_size = min(encrypted_img.size, 10000)  # Limit size
-            enc_sample = encrypted_img.flatten()[:sample_size]
-            size = int(np.sqrt(sample_size))
-            enc_vis = enc_sample.reshape(size, size)
-        except:
-            enc_vis = encrypted_img  # Use as is
-    else:
-        enc_vis = encrypted_img
-    
-    entropy_encrypted = local_entropy(enc_vis)
+    entropy_encrypted = local_entropy(encrypted_img)
     im2 = axes[1].imshow(entropy_encrypted, cmap='viridis')
     axes[1].set_title(f"Encrypted Data Local Entropy\nMean: {np.mean(entropy_encrypted):.4f}")
     axes[1].axis('off')
@@ -424,6 +396,8 @@ def generate_entropy_maps(original_img, encrypted_img, filename):
 
 def save_histogram(image, title, filename, color_mode="gray"): # Keep original function if needed elsewhere, but new function is preferred
     """Compute and save the histogram of an image."""
+    import matplotlib.pyplot as plt
+    
     plt.figure(figsize=(8, 5))
     if color_mode == "gray":
         hist = cv2.calcHist([image], [0], None, [256], [0, 256])
@@ -454,12 +428,16 @@ if __name__ == "__main__":
         print("[i] Info: Decrypted image 'images/decrypted.png' not found. Comparison will be limited.")
         # Proceed without decrypted image if necessary, plot_histograms_and_images handles None
 
-    # Load Encrypted Image Data
-    try:
-        encrypted_data = np.load("images/encrypted.npy", allow_pickle=True)
-    except FileNotFoundError:
-        print("[!] Error: Encrypted data 'images/encrypted.npy' not found.")
-        exit()
+    # Load Encrypted Image Data (ciphertext container, or legacy .npy)
+    if os.path.exists("images/encrypted.dnac"):
+        with ContainerReader("images/encrypted.dnac") as reader:
+            encrypted_data = np.concatenate([np.frombuffer(chunk, dtype=np.uint8) for chunk in reader.chunks()])
+    else:
+        try:
+            encrypted_data = np.load("images/encrypted.npy", allow_pickle=True)
+        except FileNotFoundError:
+            print("[!] Error: Encrypted data 'images/encrypted.dnac' not found.")
+            exit()
 
     # Convert encrypted data to a flat byte array for histogram/entropy
     if encrypted_data.ndim == 0: # Scalar object (e.g., string)
@@ -1,40 +1,280 @@
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
 import base64
+import functools
 import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Key file location
-KEY_FILE = "src/aes_key.bin"
+# Key file location (next to this module, independent of the working directory)
+KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aes_key.bin")
 KEY_SIZE = 16  # 128 bits - more reliable across implementations
 IV_SIZE = 12   # GCM nonce size
+TAG_SIZE = 16  # GCM tag size
 
-def generate_or_load_key():
-    """Generate a new key or load existing key"""
-    if os.path.exists(KEY_FILE):
-        # Load existing key
-        with open(KEY_FILE, "rb") as f:
-            key = f.read()
-        
-        # Check if key has correct length, regenerate if not
+# Segmented AES-GCM: each segment's nonce is the random base nonce followed
+# by the big-endian segment index and a final-segment flag, so segments
+# cannot be reordered, dropped from the end or moved between streams
+SEGMENT_SIZE = 1 << 20  # Default plaintext bytes per segment
+BASE_NONCE_SIZE = IV_SIZE - 5
+
+# A 56-bit random base nonce is too short to stay unique across many
+# containers under one long-lived key, so every stream is encrypted under
+# its own subkey, derived from the master key and a random 128-bit salt
+SALT_SIZE = 16
+SUBKEY_CONTEXT = b"DNACHAOS AES-GCM-STREAM subkey"
+
+def get_random_bytes(length):
+    """Cryptographically secure random bytes (what Crypto.Random.get_random_bytes returns)"""
+    return os.urandom(length)
+
+class KeyManager:
+    """Load the AES key once and keep it in memory
+    
+    The key file's mtime is re-checked at most every `check_interval`
+    seconds (0 checks on every access, None never checks), and reload()
+    forces a fresh read. Batch callers can take a cached cipher factory
+    instead of looking the key up per image.
+    """
+    
+    def __init__(self, key_file=KEY_FILE, check_interval=1.0):
+        self.key_file = key_file
+        self.check_interval = check_interval
+        self.loads = 0
+        self._key = None
+        self._mtime_ns = None
+        self._last_check = 0.0
+        self._cipher_factory = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_key(cls, key):
+        """Create a manager around an in-memory key with no backing file"""
         if len(key) != KEY_SIZE:
-            print(f"[!] Existing key has incorrect length ({len(key)} bytes). Regenerating...")
+            raise ValueError(f"Key must be {KEY_SIZE} bytes, got {len(key)}")
+        manager = cls(key_file=None, check_interval=None)
+        manager._key = bytes(key)
+        return manager
+    
+    def get_key(self):
+        """Return the cached key, reloading it if the key file changed"""
+        with self._lock:
+            if self._key is None:
+                self._load()
+            elif self.key_file is not None and self.check_interval is not None:
+                now = time.monotonic()
+                if now - self._last_check >= self.check_interval:
+                    self._last_check = now
+                    try:
+                        mtime_ns = os.stat(self.key_file).st_mtime_ns
+                    except FileNotFoundError:
+                        mtime_ns = None
+                    if mtime_ns != self._mtime_ns:
+                        self._load()
+            return self._key
+    
+    def reload(self):
+        """Force the key to be re-read from disk"""
+        with self._lock:
+            if self.key_file is not None:
+                self._load()
+            return self._key
+    
+    def cipher_factory(self):
+        """Return a callable nonce -> AES-GCM cipher bound to the current key"""
+        key = self.get_key()
+        with self._lock:
+            if self._cipher_factory is None or self._cipher_factory.args[0] != key:
+                self._cipher_factory = functools.partial(_new_gcm_cipher, key)
+            return self._cipher_factory
+    
+    def new_cipher(self, nonce=None):
+        """Create an AES-GCM cipher with the given (or a random) nonce"""
+        return self.cipher_factory()(get_random_bytes(IV_SIZE) if nonce is None else nonce)
+    
+    def _load(self):
+        """Generate a new key or load the existing key file (lock held)"""
+        if os.path.exists(self.key_file):
+            # Load existing key
+            with open(self.key_file, "rb") as f:
+                key = f.read()
+            
+            # Check if key has correct length, regenerate if not
+            if len(key) != KEY_SIZE:
+                print(f"[!] Existing key has incorrect length ({len(key)} bytes). Regenerating...")
+                key = get_random_bytes(KEY_SIZE)
+                with open(self.key_file, "wb") as f:
+                    f.write(key)
+        else:
+            # Generate new random key and save it to file
             key = get_random_bytes(KEY_SIZE)
-            with open(KEY_FILE, "wb") as f:
+            with open(self.key_file, "wb") as f:
                 f.write(key)
-    else:
-        # Generate new random key
-        key = get_random_bytes(KEY_SIZE)
-        # Save key to file
-        with open(KEY_FILE, "wb") as f:
-            f.write(key)
+        
+        self._key = key
+        self._mtime_ns = os.stat(self.key_file).st_mtime_ns
+        self._last_check = time.monotonic()
+        self._cipher_factory = None
+        self.loads += 1
+
+def _new_gcm_cipher(key, nonce):
+    # pycryptodome is imported on first use so CLIs start without it
+    from Crypto.Cipher import AES
+    return AES.new(key, AES.MODE_GCM, nonce=nonce)
+
+_DEFAULT_KEY_MANAGER = None
+
+def default_key_manager():
+    """Return the process-wide KeyManager for KEY_FILE"""
+    global _DEFAULT_KEY_MANAGER
+    if _DEFAULT_KEY_MANAGER is None:
+        _DEFAULT_KEY_MANAGER = KeyManager()
+    return _DEFAULT_KEY_MANAGER
+
+def generate_or_load_key():
+    """Generate a new key or load existing key"""
+    return default_key_manager().get_key()
+
+def derive_subkey(key, salt):
+    """Derive a stream's AES key from the master key and its salt (HKDF-SHA256)"""
+    from Crypto.Hash import SHA256
+    from Crypto.Protocol.KDF import HKDF
+    return HKDF(key, KEY_SIZE, salt, SHA256, context=SUBKEY_CONTEXT)
+
+def _resolve_cipher_factory(key, key_manager):
+    """Pick the cipher factory for an explicit key or a key manager"""
+    if key is not None:
+        return functools.partial(_new_gcm_cipher, key)
+    return (key_manager or default_key_manager()).cipher_factory()
+
+def encrypt_dna_bytes(plaintext, key=None, key_manager=None):
+    """Encrypt raw plaintext bytes with AES-GCM
     
-    return key
+    Args:
+        plaintext: Bytes to encrypt
+        key: AES key (default: taken from the key manager)
+        key_manager: KeyManager to take the key from (default: default_key_manager())
+    
+    Returns:
+        Raw bytes laid out as nonce + tag + ciphertext
+    """
+    # Generate random nonce
+    nonce = get_random_bytes(IV_SIZE)
+    
+    # Create cipher and encrypt data
+    cipher = _resolve_cipher_factory(key, key_manager)(nonce)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+    
+    # Format: nonce + tag + ciphertext
+    return nonce + tag + ciphertext
 
-def encrypt_dna(dna_sequence):
-    """Encrypt DNA sequence using AES-GCM mode"""
-    # Get key
-    key = generate_or_load_key()
+def decrypt_dna_bytes(data, key=None, key_manager=None):
+    """Decrypt and verify raw nonce + tag + ciphertext bytes from encrypt_dna_bytes"""
+    # Extract components
+    data = memoryview(data)
+    nonce = data[:IV_SIZE]
+    tag = data[IV_SIZE:IV_SIZE+TAG_SIZE]
+    ciphertext = data[IV_SIZE+TAG_SIZE:]
+    
+    # Create cipher, decrypt and verify
+    cipher = _resolve_cipher_factory(key, key_manager)(bytes(nonce))
+    return cipher.decrypt_and_verify(ciphertext, bytes(tag))
+
+class SegmentedCipher:
+    """AES-GCM over independently authenticated fixed-size segments
+    
+    Segment i is encrypted under nonce base_nonce || i || last_flag with a
+    subkey derived from the master key and the stream's random salt, and
+    stored as ciphertext + tag. Segments can be encrypted and decrypted in
+    parallel, and any range can be decrypted without touching the rest.
+    Every segment also authenticates `associated_data` (a container's
+    header bytes), so changing it makes every segment fail verification.
+    """
+    
+    def __init__(self, key=None, key_manager=None, base_nonce=None, salt=None, associated_data=b""):
+        if salt is None:
+            salt = get_random_bytes(SALT_SIZE)
+        if len(salt) < SALT_SIZE:
+            raise ValueError(f"Salt must be at least {SALT_SIZE} bytes, got {len(salt)}")
+        self.salt = bytes(salt)
+        master = key if key is not None else (key_manager or default_key_manager()).get_key()
+        self._factory = functools.partial(_new_gcm_cipher, derive_subkey(master, self.salt))
+        if base_nonce is None:
+            base_nonce = get_random_bytes(BASE_NONCE_SIZE)
+        if len(base_nonce) != BASE_NONCE_SIZE:
+            raise ValueError(f"Base nonce must be {BASE_NONCE_SIZE} bytes, got {len(base_nonce)}")
+        self.base_nonce = bytes(base_nonce)
+        self.associated_data = bytes(associated_data)
+    
+    def segment_nonce(self, index, last):
+        """Derive the nonce of segment `index`"""
+        return self.base_nonce + struct.pack(">IB", index, 1 if last else 0)
+    
+    def encrypt_segment(self, index, plaintext, last=False):
+        """Encrypt one segment and return ciphertext + tag"""
+        cipher = self._factory(self.segment_nonce(index, last))
+        cipher.update(self.associated_data)
+        ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+        return ciphertext + tag
+    
+    def decrypt_segment(self, index, segment, last=False):
+        """Decrypt and verify one ciphertext + tag segment"""
+        segment = memoryview(segment)
+        if len(segment) < TAG_SIZE:
+            raise ValueError(f"Segment {index} is shorter than its tag")
+        cipher = self._factory(self.segment_nonce(index, last))
+        cipher.update(self.associated_data)
+        return cipher.decrypt_and_verify(segment[:-TAG_SIZE], bytes(segment[-TAG_SIZE:]))
     
+    def encrypt(self, plaintext, segment_size=SEGMENT_SIZE, workers=None):
+        """Split plaintext into segments and encrypt them across a thread pool
+        
+        Returns:
+            List of ciphertext + tag segments (at least one, even for empty input)
+        """
+        view = memoryview(plaintext).cast("B")
+        count = max(1, -(-len(view) // segment_size))
+        
+        def encrypt_one(index):
+            chunk = view[index * segment_size:(index + 1) * segment_size]
+            return self.encrypt_segment(index, chunk, last=index == count - 1)
+        
+        return _map_segments(encrypt_one, range(count), workers)
+    
+    def decrypt(self, segments, start=0, stop=None, workers=None):
+        """Decrypt segments[start:stop] across a thread pool
+        
+        Args:
+            segments: Indexable sequence of every segment in the stream
+                (only the requested range is read)
+            start: First segment to decrypt
+            stop: Segment after the last one to decrypt (default: all)
+            workers: Thread pool size (default: Python's default)
+        
+        Returns:
+            List of plaintext segments
+        """
+        count = len(segments)
+        if count == 0:
+            raise ValueError("Segmented ciphertext has no segments")
+        stop = count if stop is None else stop
+        if not 0 <= start <= stop <= count:
+            raise IndexError(f"Segment range [{start}, {stop}) outside 0..{count}")
+        
+        def decrypt_one(index):
+            return self.decrypt_segment(index, segments[index], last=index == count - 1)
+        
+        return _map_segments(decrypt_one, range(start, stop), workers)
+
+def _map_segments(function, indices, workers):
+    """Run function over segment indices, in a thread pool when there are several"""
+    if len(indices) <= 1 or workers == 1:
+        return [function(index) for index in indices]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, indices))
+
+def encrypt_dna(dna_sequence, key_manager=None):
+    """Encrypt DNA sequence using AES-GCM mode"""
     # Convert to bytes if string
     if isinstance(dna_sequence, str):
         plaintext = dna_sequence.encode('utf-8')
@@ -42,26 +282,13 @@ def encrypt_dna(dna_sequence):
         # Handle numpy array or other sequence
         plaintext = ''.join(str(x) for x in dna_sequence).encode('utf-8')
     
-    # Generate random nonce
-    nonce = get_random_bytes(IV_SIZE)
-    
-    # Create cipher
-    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
-    
-    # Encrypt data
-    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
-    
-    # Format: nonce + tag + ciphertext
-    encrypted_data = nonce + tag + ciphertext
+    encrypted_data = encrypt_dna_bytes(plaintext, key_manager=key_manager)
     
     # Convert to base64 string for storage
     return base64.b64encode(encrypted_data).decode('utf-8')
 
-def decrypt_dna(encrypted_data):
+def decrypt_dna(encrypted_data, key_manager=None):
     """Decrypt DNA sequence using AES-GCM mode"""
-    # Get key
-    key = generate_or_load_key()
-    
     # If input is string (most likely scenario)
     if isinstance(encrypted_data, str):
         encoded_data = encrypted_data
@@ -69,19 +296,8 @@ def decrypt_dna(encrypted_data):
         # Handle numpy array or other object
         encoded_data = str(encrypted_data.item()) if hasattr(encrypted_data, 'item') else str(encrypted_data)
     
-    # Decode base64
-    data = base64.b64decode(encoded_data)
-    
-    # Extract components
-    nonce = data[:IV_SIZE]  
-    tag = data[IV_SIZE:IV_SIZE+16]  # GCM tag is 16 bytes
-    ciphertext = data[IV_SIZE+16:]
-    
-    # Create cipher
-    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
-    
-    # Decrypt and verify
-    plaintext = cipher.decrypt_and_verify(ciphertext, tag)
+    # Decode base64, then decrypt and verify
+    plaintext = decrypt_dna_bytes(base64.b64decode(encoded_data), key_manager=key_manager)
     
     # Return as string
     return plaintext.decode('utf-8')
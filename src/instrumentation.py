@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+class NullSink:
+    """Discard every record (the default)"""
+
+    def emit(self, record):
+        pass
+
+    def close(self):
+        pass
+
+class MemorySink:
+    """Keep records in a list, e.g. for tests"""
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+class JsonLinesSink:
+    """Append one JSON object per stage to a file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class Instrumentation:
+    """
+    Record wall time, CPU time and allocation peak for named pipeline stages
+
+    Args:
+        sink: Where stage records go (default: NullSink)
+        trace_memory: Track each stage's allocation peak with tracemalloc
+            (slows allocation-heavy stages; ignored with a NullSink)
+        profile_stage: Name of one stage to capture with cProfile; every call
+            in this process (e.g. one per band or frame) is added to one profile
+        profile_output: Where close() writes the profile (default: <stage>.prof)
+    """
+
+    def __init__(self, sink=None, trace_memory=True, profile_stage=None, profile_output=None):
+        self.sink = sink if sink is not None else NullSink()
+        self.enabled = not isinstance(self.sink, NullSink) or profile_stage is not None
+        self.trace_memory = trace_memory and not isinstance(self.sink, NullSink)
+        self.profile_stage = profile_stage
+        self.profile_output = profile_output or (f"{profile_stage}.prof" if profile_stage else None)
+        self._profile_stats = None
+        self._profile_lock = threading.Lock()
+        self._pid = os.getpid()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Measure the enclosed block as stage `name`; extra fields are added to the record"""
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._local.__dict__.setdefault("stack", [])
+        frame = {"child_peak": 0, "start_traced": 0}
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Keep the enclosing stage's peak before resetting it for this one
+                stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)
+            tracemalloc.reset_peak()
+            frame["start_traced"] = current
+        stack.append(frame)
+
+        # Forked workers never call close(), so only this process profiles
+        profiler = cProfile.Profile() if name == self.profile_stage and os.getpid() == self._pid else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler; concurrent calls go unprofiled
+                profiler = None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record = {
+                "stage": name,
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": time.process_time() - cpu_start,
+                "peak_bytes": None,
+                "pid": os.getpid(),
+                "timestamp": time.time(),
+            }
+            record.update(fields)
+            stack.pop()
+            if self.trace_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame["child_peak"])
+                record["peak_bytes"] = max(peak - frame["start_traced"], 0)
+                if stack:
+                    stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)
+                if started_tracing:
+                    tracemalloc.stop()
+            if profiler is not None:
+                with self._profile_lock:
+                    if self._profile_stats is None:
+                        self._profile_stats = pstats.Stats(profiler)
+                    else:
+                        self._profile_stats.add(profiler)
+                record["profile"] = self.profile_output
+            self.sink.emit(record)
+
+    def close(self):
+        """Write the accumulated profile and close the sink"""
+        with self._profile_lock:
+            stats, self._profile_stats = self._profile_stats, None
+        if stats is not None:
+            stats.dump_stats(self.profile_output)
+        self.sink.close()
+
+# Process-wide instrumentation used by the pipeline (a no-op by default)
+_ACTIVE = Instrumentation()
+
+def current():
+    """Return the active Instrumentation"""
+    return _ACTIVE
+
+def install(instrumentation):
+    """Make `instrumentation` the active one and return the previous one"""
+    global _ACTIVE
+    previous = _ACTIVE
+    _ACTIVE = instrumentation if instrumentation is not None else Instrumentation()
+    return previous
+
+def stage(name, **fields):
+    """Measure a block as a stage of the active Instrumentation"""
+    return _ACTIVE.stage(name, **fields)
+
+def add_instrumentation_arguments(parser):
+    """Add the shared --metrics / --profile-stage CLI flags to an argparse parser"""
+    parser.add_argument("--metrics", help="Append per-stage timing and memory records to this JSON-lines file")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="Do not track per-stage allocation peaks (lower overhead)")
+    parser.add_argument("--profile-stage", help="Capture this stage with cProfile")
+    parser.add_argument("--profile-output", help="Where to write the cProfile stats (default: <stage>.prof)")
+
+def install_from_args(args):
+    """Install an Instrumentation configured from parsed CLI flags; it is closed at exit"""
+    sink = JsonLinesSink(args.metrics) if args.metrics else None
+    instrumentation = Instrumentation(sink=sink, trace_memory=not args.no_trace_memory,
+                                      profile_stage=args.profile_stage, profile_output=args.profile_output)
+    atexit.register(instrumentation.close)
+    return install(instrumentation)
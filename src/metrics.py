@@ -0,0 +1,285 @@
+import sys
+import json
+import argparse
+import numpy as np
+from container import ContainerReader, is_container_file
+
+# Neighbour offsets (rows, columns) for adjacent-pixel correlation
+DIRECTIONS = {
+    "horizontal": (0, 1),
+    "vertical": (1, 0),
+    "diagonal": (1, 1),
+}
+
+# Set bits of every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+def _planes(data):
+    """Split uint8 data into 2D planes: one per channel, or a near-square plane for flat buffers"""
+    data = np.asarray(data)
+    if data.ndim == 1:
+        # Flat ciphertext: use the largest square, like the plotted analysis
+        side = int(np.sqrt(data.size))
+        return [data[:side * side].reshape(side, side)]
+    if data.ndim == 2:
+        return [data]
+    return [data[..., c] for c in range(data.shape[2])]
+
+def shannon_entropy(data):
+    """
+    Shannon entropy (bits per symbol) of uint8 data
+
+    Args:
+        data: Image or byte buffer (all values are counted)
+
+    Returns:
+        Entropy in bits (8.0 is the maximum)
+    """
+    counts = np.bincount(np.asarray(data, dtype=np.uint8).reshape(-1), minlength=256)
+    if not counts.any():
+        return 0.0
+    probabilities = counts[counts > 0] / counts.sum()
+    return float(-np.sum(probabilities * np.log2(probabilities)))
+
+def channel_entropies(image):
+    """Shannon entropy of every channel of an image (one value for grayscale or flat data)"""
+    return [shannon_entropy(plane) for plane in _planes(image)]
+
+def adjacent_correlation(plane, direction="horizontal"):
+    """
+    Pearson correlation between every pixel and its neighbour in one direction
+
+    Uses all pixel pairs of the plane (no sampling).
+
+    Returns:
+        Correlation coefficient, or 0.0 when either side is constant
+    """
+    dy, dx = DIRECTIONS[direction]
+    height, width = plane.shape
+    x = plane[:height - dy, :width - dx].astype(np.float64)
+    y = plane[dy:, dx:].astype(np.float64)
+    if x.size < 2:
+        return 0.0
+    x -= x.mean()
+    y -= y.mean()
+    denominator = np.sqrt(np.einsum("ij,ij->", x, x) * np.einsum("ij,ij->", y, y))
+    if denominator == 0:
+        return 0.0
+    return float(np.einsum("ij,ij->", x, y) / denominator)
+
+def adjacent_correlations(image):
+    """
+    Adjacent-pixel correlations of every channel in every direction
+
+    Returns:
+        Dictionary mapping direction to a list with one coefficient per channel
+    """
+    planes = _planes(image)
+    return {direction: [adjacent_correlation(plane, direction) for plane in planes] for direction in DIRECTIONS}
+
+def npcr_uaci(first, second):
+    """
+    Number of Pixels Change Rate and Unified Average Changing Intensity
+
+    Args:
+        first: uint8 image or ciphertext
+        second: uint8 image or ciphertext of the same shape
+
+    Returns:
+        (NPCR %, UACI %)
+    """
+    first = np.asarray(first, dtype=np.uint8)
+    second = np.asarray(second, dtype=np.uint8)
+    if first.shape != second.shape:
+        raise ValueError(f"Cannot compare data of shapes {first.shape} and {second.shape}")
+    if first.size == 0:
+        return 0.0, 0.0
+    changed = np.count_nonzero(first != second)
+    # |a - b| without widening: max - min stays within uint8
+    intensity = np.maximum(first, second) - np.minimum(first, second)
+    total = np.sum(intensity, dtype=np.uint64)
+    return float(changed / first.size * 100), float(total / (255 * first.size) * 100)
+
+def bit_change_rate(first, second):
+    """Percentage of differing bits between two uint8 buffers of the same shape"""
+    first = np.asarray(first, dtype=np.uint8)
+    second = np.asarray(second, dtype=np.uint8)
+    if first.shape != second.shape:
+        raise ValueError(f"Cannot compare data of shapes {first.shape} and {second.shape}")
+    if first.size == 0:
+        return 0.0
+    changed = np.sum(_POPCOUNT[first ^ second], dtype=np.uint64)
+    return float(changed / (8 * first.size) * 100)
+
+def local_entropy(plane, window=9, bins=256):
+    """
+    Shannon entropy of the square window around every pixel of a 2D plane
+
+    For every grey level present, its count in each window is a box sum of
+    the level's indicator image (cv2.boxFilter keeps running sums), so the
+    cost per pixel does not depend on the window size. Entropy then follows
+    from the counts as log2(N) - sum(c * log2(c)) / N. Borders are reflected
+    so every window holds window * window samples.
+
+    Args:
+        plane: 2D uint8 array
+        window: Odd side length of the square window
+        bins: Grey levels to quantize to (256 keeps every value; fewer is faster)
+
+    Returns:
+        float32 entropy map (bits) of the plane's shape
+    """
+    import cv2
+
+    plane = np.asarray(plane, dtype=np.uint8)
+    if window < 1 or window % 2 == 0:
+        raise ValueError(f"Window must be a positive odd size, got {window}")
+    if window > min(plane.shape):
+        raise ValueError(f"Window {window} is larger than the {plane.shape[0]}x{plane.shape[1]} plane")
+    if not 2 <= bins <= 256:
+        raise ValueError(f"Bins must be between 2 and 256, got {bins}")
+    levels = plane if bins == 256 else ((plane.astype(np.uint16) * bins) >> 8).astype(np.uint8)
+
+    area = window * window
+    counts_range = np.arange(area + 1, dtype=np.float64)
+    table = np.zeros(area + 1, dtype=np.float32)
+    table[1:] = counts_range[1:] * np.log2(counts_range[1:])
+
+    total = np.zeros(plane.shape, dtype=np.float32)
+    indicator = np.empty(plane.shape, dtype=np.uint8)
+    counts = np.empty(plane.shape, dtype=np.int32)
+    terms = np.empty(plane.shape, dtype=np.float32)
+    for level in np.flatnonzero(np.bincount(levels.reshape(-1), minlength=bins)):
+        np.equal(levels, level, out=indicator.view(bool))
+        cv2.boxFilter(indicator, cv2.CV_32S, (window, window), dst=counts, normalize=False,
+                      borderType=cv2.BORDER_REFLECT_101)
+        np.take(table, counts, out=terms)
+        total += terms
+    total *= -1.0 / area
+    total += np.log2(area)
+    return total
+
+def local_entropy_maps(data, window=9, bins=256):
+    """Local entropy map of every channel (one map for grayscale or flat data)"""
+    return [local_entropy(plane, window=window, bins=bins) for plane in _planes(data)]
+
+def local_entropy_stats(data, window=9, bins=256):
+    """
+    Entropy-uniformity statistics of the local entropy maps of every channel
+
+    Returns:
+        JSON-serializable dictionary with the window, the highest possible
+        local entropy and per-channel mean/std/min/max/1st and 99th percentile
+    """
+    channels = []
+    for entropy_map in local_entropy_maps(data, window=window, bins=bins):
+        p1, p99 = np.percentile(entropy_map, [1, 99])
+        channels.append({
+            "mean": float(entropy_map.mean(dtype=np.float64)),
+            "std": float(entropy_map.std(dtype=np.float64)),
+            "min": float(entropy_map.min()),
+            "max": float(entropy_map.max()),
+            "p1": float(p1),
+            "p99": float(p99),
+        })
+    return {
+        "window": window,
+        "bins": bins,
+        "max_possible": float(min(np.log2(bins), np.log2(window * window))),
+        "channels": channels,
+    }
+
+def image_metrics(data, local_window=None, local_bins=256):
+    """
+    Entropy and adjacent-pixel correlation metrics for one image or ciphertext
+
+    Args:
+        data: uint8 image or flat ciphertext
+        local_window: Also report local-entropy statistics for this window size
+
+    Returns:
+        JSON-serializable dictionary
+    """
+    data = np.asarray(data)
+    result = {
+        "shape": list(data.shape),
+        "entropy": shannon_entropy(data),
+        "channel_entropy": channel_entropies(data),
+        "correlation": adjacent_correlations(data),
+    }
+    if local_window:
+        result["local_entropy"] = local_entropy_stats(data, window=local_window, bins=local_bins)
+    return result
+
+def differential_metrics(first, second):
+    """NPCR/UACI overall and per channel, as a JSON-serializable dictionary"""
+    npcr, uaci = npcr_uaci(first, second)
+    channels = [npcr_uaci(a, b) for a, b in zip(_planes(first), _planes(second))]
+    return {
+        "npcr": npcr,
+        "uaci": uaci,
+        "channel_npcr": [c[0] for c in channels],
+        "channel_uaci": [c[1] for c in channels],
+    }
+
+def load_data(path):
+    """
+    Load an image, a ciphertext container (chunk bytes) or a legacy .npy ciphertext as uint8
+
+    Returns:
+        uint8 array (flat for ciphertexts)
+    """
+    import cv2
+
+    if is_container_file(path):
+        with ContainerReader(path) as reader:
+            return np.frombuffer(b"".join(reader.chunks()), dtype=np.uint8)
+    if path.endswith(".npy"):
+        data = np.load(path, allow_pickle=True)
+        if data.dtype.kind in "OUS":
+            # Legacy base64 ciphertext string
+            return np.frombuffer(str(data.item() if data.ndim == 0 else "".join(map(str, data.tolist()))).encode(),
+                                 dtype=np.uint8)
+        return data.astype(np.uint8).reshape(-1)
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Could not load {path}")
+    return image
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless encryption quality metrics "
+                                                 "(entropy, local entropy, correlation, NPCR/UACI)")
+    parser.add_argument("paths", nargs="+", help="Images, ciphertext containers or legacy .npy ciphertexts")
+    parser.add_argument("--reference", help="Compute NPCR/UACI of every input against this file")
+    parser.add_argument("--local-entropy", type=int, metavar="WINDOW",
+                        help="Also report local-entropy uniformity for this (odd) window size")
+    parser.add_argument("--local-bins", type=int, default=256, help="Grey levels for local entropy (default: 256)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+
+    args = parser.parse_args()
+
+    reference = load_data(args.reference) if args.reference else None
+    report = {}
+    for path in args.paths:
+        try:
+            data = load_data(path)
+            result = image_metrics(data, local_window=args.local_entropy, local_bins=args.local_bins)
+        except Exception as e:
+            print(f"[✘] {path}: {e}", file=sys.stderr)
+            report[path] = {"error": str(e)}
+            continue
+        if reference is not None:
+            try:
+                result["differential"] = differential_metrics(reference, data)
+            except ValueError as e:
+                print(f"[!] {path}: {e}", file=sys.stderr)
+                result["differential"] = {"error": str(e)}
+        report[path] = result
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"[✔] Metrics saved to {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
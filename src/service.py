@@ -0,0 +1,397 @@
+import os
+import sys
+import json
+import hmac
+import time
+import socket
+import asyncio
+import argparse
+import ipaddress
+import statistics
+from collections import deque
+
+# Jobs the service accepts; each runs in a worker process (see _run_job)
+JOB_OPS = ("encrypt", "decrypt", "hide", "extract")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+QUEUE_SIZE = 64  # Jobs waiting for a worker before clients are made to wait
+LATENCY_WINDOW = 1024  # Most recent jobs per op kept for latency percentiles
+MAX_LINE = 1 << 20  # Longest accepted request line
+TOKEN_ENV = "DNACRYPT_SERVICE_TOKEN"  # Shared token for --allow-remote (or pass --token)
+
+def _init_worker():
+    """Import the pipeline and load the AES key once per worker process"""
+    import cv2  # noqa: F401
+    import encrypt  # noqa: F401
+    import decrypt  # noqa: F401
+    import steganography  # noqa: F401
+    from hybrid_crypto import generate_or_load_key, _new_gcm_cipher
+    _new_gcm_cipher(generate_or_load_key(), bytes(12))
+
+def _run_job(op, params):
+    """
+    Run one job in a worker process
+
+    Paths are resolved against the service's working directory.
+
+    Returns:
+        Dictionary with the output path and the seconds the job took in the worker
+    """
+    start = time.perf_counter()
+    if op == "encrypt":
+        from encrypt import encrypt_image
+        output = encrypt_image(params["image"], output_dir=params.get("output_dir", "images"),
+                               use_steganography=params.get("steganography", False),
+                               cover_image=params.get("cover"), output_name=params.get("output_name", "encrypted"),
+                               stego_bits=params.get("stego_bits", 1),
+                               permutation=params.get("permutation", "argsort"),
+                               scramble_mode=params.get("scramble", "nucleotide"),
+                               block_size=params.get("block_size", 8))
+    elif op == "decrypt":
+        from decrypt import decrypt_image
+        output = decrypt_image(encrypted_path=params.get("encrypted"), shape_path=params.get("shape"),
+                               output_path=params.get("output"), stego_image=params.get("stego"))
+    elif op == "hide":
+        from steganography import hide_encrypted_data
+        output = hide_encrypted_data(params["data"], cover_image_path=params.get("cover"),
+                                     output_path=params.get("stego"), bits_per_channel=params.get("bits", 1))
+    elif op == "extract":
+        from steganography import extract_encrypted_data
+        output = extract_encrypted_data(params["stego"], output_path=params.get("output"))
+    else:
+        raise ValueError(f"Unknown job {op!r} (expected one of {JOB_OPS})")
+    return {"output": output, "worker_s": time.perf_counter() - start}
+
+def is_loopback(host):
+    """Whether a listen address only accepts connections from this machine"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+class EncryptionService:
+    """
+    Long-lived asyncio front end that runs pipeline jobs on a process pool
+
+    Clients send one JSON object per line, e.g.
+    {"id": 1, "op": "encrypt", "image": "in.png", "output_dir": "out"},
+    and get one JSON line back per request (matched by "id", in completion
+    order). Besides the JOB_OPS jobs, "stats" and "ping" are answered
+    directly by the front end.
+
+    Jobs read and write arbitrary paths on the service's machine, so by
+    default the service only listens on loopback or a Unix socket. Other
+    hosts need allow_remote and a shared token, which every request must
+    then carry as "token" (a token can also be required on loopback).
+
+    Jobs wait in a bounded queue. When it is full the connection that sent
+    the job stops being read until a slot frees up, so producers are slowed
+    down instead of the service buffering without limit.
+
+    Args:
+        host: Interface to listen on (ignored with socket_path)
+        port: TCP port (0 picks a free one; see address)
+        socket_path: Listen on this Unix socket instead of TCP
+        workers: Worker processes (default: CPU count)
+        queue_size: Jobs that may wait for a worker
+        token: Shared token every request must carry (required with allow_remote)
+        allow_remote: Allow listening on a non-loopback host
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, workers=None, queue_size=QUEUE_SIZE,
+                 token=None, allow_remote=False):
+        if not socket_path and not is_loopback(host):
+            if not allow_remote:
+                raise ValueError(f"Refusing to listen on non-loopback host {host!r}: the service reads and writes "
+                                 f"arbitrary paths (pass allow_remote=True with a token to override)")
+            if not token:
+                raise ValueError(f"Listening on non-loopback host {host!r} requires a token")
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self._token = token.encode() if token else None
+        self.address = None
+        self._queue = None
+        self._pool = None
+        self._server = None
+        self._dispatchers = []
+        self._connections = {}  # writer -> futures of its unanswered jobs
+        self._handlers = set()
+        self._closing = False
+        self._started = None
+        self._in_flight = 0
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0}
+        self._latency = {op: deque(maxlen=LATENCY_WINDOW) for op in JOB_OPS}
+        self._queue_wait = {op: deque(maxlen=LATENCY_WINDOW) for op in JOB_OPS}
+
+    async def start(self):
+        """Start the worker pool, the dispatchers and the listener"""
+        from concurrent.futures import ProcessPoolExecutor
+        from hybrid_crypto import generate_or_load_key
+
+        # Create the key file (if missing) before any worker starts; workers that
+        # each found no key would generate and use different keys
+        generate_or_load_key()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        # Start (and warm up) every worker before listening: workers forked later would
+        # inherit client sockets and keep connections open after the service closes them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)))
+        # One dispatcher per worker keeps every worker busy without over-submitting to the pool
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=MAX_LINE)
+            self.address = self.socket_path
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_LINE)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        self._started = time.monotonic()
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections, cancel queued jobs and shut the pool down"""
+        self._closing = True
+        self._server.close()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        for writer, pending in list(self._connections.items()):
+            for done in pending:
+                done.cancel()
+            writer.close()
+        # Handlers blocked on a full queue would never wake up
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def stats(self):
+        """Queue depth, job counters and per-op latency (end to end and queue wait)"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "workers": self.workers,
+            "connections": len(self._connections),
+            "uptime_s": time.monotonic() - self._started,
+            **self._counts,
+            "latency": {op: _percentiles(self._latency[op]) for op in JOB_OPS},
+            "queue_wait": {op: _percentiles(self._queue_wait[op]) for op in JOB_OPS},
+        }
+
+    async def _handle(self, reader, writer):
+        """Read requests from one connection and queue its jobs"""
+        pending = self._connections[writer] = set()
+        lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self._respond(writer, lock, {"ok": False, "error": "Request line too long"})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                received = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                except ValueError as e:
+                    await self._respond(writer, lock, {"ok": False, "error": f"Invalid request: {e}"})
+                    continue
+                op = request.get("op")
+                response = {"id": request.get("id"), "op": op}
+                if self._token is not None and not hmac.compare_digest(
+                        str(request.get("token", "")).encode(), self._token):
+                    await self._respond(writer, lock, {**response, "ok": False, "error": "Invalid or missing token"})
+                    break
+                if op == "ping":
+                    await self._respond(writer, lock, {**response, "ok": True})
+                elif op == "stats":
+                    await self._respond(writer, lock, {**response, "ok": True, "result": self.stats()})
+                elif op in JOB_OPS:
+                    params = {k: v for k, v in request.items() if k not in ("id", "op", "token")}
+                    done = loop.create_future()
+                    done.add_done_callback(pending.discard)
+                    pending.add(done)
+                    # Blocks (and stops reading this connection) while the queue is full
+                    await self._queue.put((op, params, response, received, writer, lock, done))
+                    self._counts["submitted"] += 1
+                else:
+                    await self._respond(writer, lock, {**response, "ok": False,
+                                                       "error": f"Unknown op {op!r} (expected one of "
+                                                                f"{JOB_OPS + ('stats', 'ping')})"})
+            # The client may half-close after its last request; answer every queued job first
+            await asyncio.gather(*pending, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Cancelled by close(); ending normally keeps asyncio from logging it
+            if not self._closing:
+                raise
+        finally:
+            self._handlers.discard(task)
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _dispatch(self):
+        """Move jobs from the queue to the worker pool and send their responses"""
+        loop = asyncio.get_running_loop()
+        while True:
+            op, params, response, received, writer, lock, done = await self._queue.get()
+            started = time.perf_counter()
+            self._in_flight += 1
+            try:
+                result = await loop.run_in_executor(self._pool, _run_job, op, params)
+                response.update({"ok": True, "result": result})
+                self._counts["completed"] += 1
+            except Exception as e:
+                response.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+                self._counts["failed"] += 1
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+            finished = time.perf_counter()
+            self._queue_wait[op].append(started - received)
+            self._latency[op].append(finished - received)
+            response.update({"queue_ms": (started - received) * 1000, "latency_ms": (finished - received) * 1000})
+            await self._respond(writer, lock, response)
+            if not done.done():
+                done.set_result(None)
+
+    @staticmethod
+    async def _respond(writer, lock, response):
+        if writer.is_closing():
+            return
+        async with lock:
+            try:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+class ServiceClient:
+    """
+    Blocking client for EncryptionService (one request in flight at a time)
+
+    Args:
+        address: (host, port) tuple or a Unix socket path
+        timeout: Socket timeout in seconds (None waits indefinitely)
+        token: Shared token sent with every request
+    """
+
+    def __init__(self, address=(DEFAULT_HOST, DEFAULT_PORT), timeout=None, token=None):
+        self.token = token
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(address)
+        else:
+            self._socket = socket.create_connection(tuple(address), timeout=timeout)
+        self._file = self._socket.makefile("rb")
+        self._next_id = 0
+
+    def call(self, op, **params):
+        """
+        Send one request and wait for its response
+
+        Returns:
+            Response dictionary ("ok", and "result" or "error")
+        """
+        self._next_id += 1
+        request = {"id": self._next_id, "op": op, **params}
+        if self.token:
+            request["token"] = self.token
+        self._socket.sendall((json.dumps(request) + "\n").encode())
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Service closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+async def _serve(args):
+    service = EncryptionService(host=args.host, port=args.port, socket_path=args.socket, workers=args.workers,
+                                queue_size=args.queue_size, token=args.token, allow_remote=args.allow_remote)
+    async with service:
+        where = service.address if args.socket else f"{service.address[0]}:{service.address[1]}"
+        print(f"[✔] Encryption service listening on {where} "
+              f"({service.workers} worker(s), queue size {service.queue_size})")
+        await service.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived encryption service (JSON lines over TCP or a Unix socket)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on or connect to")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--socket", help="Use this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Jobs that may wait for a worker")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="Allow listening on a non-loopback host (requires a token)")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"Shared token required on every request (default: ${TOKEN_ENV})")
+    parser.add_argument("--call", metavar="OP", choices=JOB_OPS + ("stats", "ping"),
+                        help="Send one request to a running service instead of serving")
+    parser.add_argument("--params", default="{}", help="JSON object of parameters for --call")
+
+    args = parser.parse_args()
+
+    if args.call:
+        with ServiceClient(args.socket or (args.host, args.port), token=args.token) as client:
+            response = client.call(args.call, **json.loads(args.params))
+        json.dump(response, sys.stdout, indent=4)
+        print()
+        sys.exit(0 if response.get("ok") else 1)
+
+    if not args.socket and not is_loopback(args.host) and not (args.allow_remote and args.token):
+        parser.error(f"--host {args.host} is not a loopback address; the service reads and writes arbitrary "
+                     f"paths, so listening on it requires --allow-remote and --token (or ${TOKEN_ENV})")
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        print("[ℹ] Encryption service stopped")
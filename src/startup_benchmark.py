@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose import dominates startup; a CLI should load them only when needed
+HEAVY_MODULES = ("numpy", "cv2", "Crypto", "matplotlib", "scipy", "skimage")
+
+# CLIs timed to `--help` (histogram_analysis has no argument parser, so only its import is timed)
+HELP_CLIS = ("encrypt", "decrypt", "steganography", "metrics", "blockchain", "differential", "benchmark")
+IMPORT_MODULES = HELP_CLIS + ("histogram_analysis",)
+
+def _run(args, cwd=None):
+    """Run a Python command and return (wall seconds, completed process)"""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable] + args, cwd=cwd, capture_output=True, text=True)
+    return time.perf_counter() - start, process
+
+def time_help(cli, repeat):
+    """Wall times of `python <cli>.py --help`"""
+    times = []
+    for _ in range(repeat):
+        seconds, process = _run([os.path.join(SRC_DIR, cli + ".py"), "--help"])
+        if process.returncode != 0:
+            raise RuntimeError(f"{cli} --help failed: {process.stderr.strip()}")
+        times.append(seconds)
+    return times
+
+def import_report(module):
+    """Import a module in a fresh interpreter; return (import seconds, heavy modules it loaded)"""
+    code = (f"import sys, time; sys.path.insert(0, {SRC_DIR!r}); start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start); "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    _, process = _run(["-c", code])
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {process.stderr.strip()}")
+    seconds, loaded = process.stdout.splitlines()[-2:]
+    return float(seconds), [m for m in loaded.split(",") if m]
+
+def time_first_stage(cli, args, workdir, repeat):
+    """
+    Seconds from launching a CLI until its first instrumented stage starts
+
+    The CLI writes per-stage records with --metrics; a record's start is its
+    end timestamp minus its wall time.
+    """
+    times = []
+    for run in range(repeat):
+        metrics_path = os.path.join(workdir, f"{cli}_{run}.jsonl")
+        launched = time.time()
+        _, process = _run([os.path.join(SRC_DIR, cli + ".py")] + args + ["--metrics", metrics_path,
+                                                                          "--no-trace-memory"], cwd=workdir)
+        if process.returncode != 0 or not os.path.exists(metrics_path):
+            raise RuntimeError(f"{cli} failed: {(process.stderr or process.stdout).strip()}")
+        with open(metrics_path) as f:
+            first = min((json.loads(line) for line in f), key=lambda r: r["timestamp"] - r["wall_s"])
+        times.append(first["timestamp"] - first["wall_s"] - launched)
+    return times
+
+def _prepare_inputs(workdir):
+    """Write a small image and cover, and encrypt the image once for the decrypt/extract runs"""
+    code = ("import numpy as np, cv2; rng = np.random.default_rng(0); "
+            "cv2.imwrite('input.png', rng.integers(0, 256, (32, 32, 3), dtype=np.uint8)); "
+            "cv2.imwrite('cover.png', rng.integers(0, 256, (384, 384, 3), dtype=np.uint8))")
+    _run(["-c", code], cwd=workdir)
+    _, process = _run([os.path.join(SRC_DIR, "encrypt.py"), "--image", "input.png", "--output-dir", ".",
+                       "--steganography", "--cover", "cover.png"], cwd=workdir)
+    if process.returncode != 0 or not os.path.exists(os.path.join(workdir, "stego_image.png")):
+        raise RuntimeError(f"Could not prepare inputs: {process.stdout.strip()}")
+
+def _summary(times):
+    return {"median_s": statistics.median(times), "min_s": min(times), "runs": times}
+
+def run_startup_benchmark(repeat=5):
+    """
+    Measure import time, time to `--help` and time to first stage for every CLI
+
+    Returns:
+        Results dictionary
+    """
+    results = {"imports": {}, "help": {}, "first_stage": {}}
+    for module in IMPORT_MODULES:
+        seconds, loaded = import_report(module)
+        results["imports"][module] = {"seconds": seconds, "heavy_modules": loaded}
+        print(f"[ℹ] import {module:<20} {seconds * 1000:8.1f} ms  heavy: {', '.join(loaded) or '-'}")
+
+    for cli in HELP_CLIS:
+        results["help"][cli] = _summary(time_help(cli, repeat))
+        print(f"[ℹ] {cli + ' --help':<27} {results['help'][cli]['median_s'] * 1000:8.1f} ms (median of {repeat})")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _prepare_inputs(workdir)
+        first_stage_runs = {
+            "encrypt": ["--image", "input.png", "--output-dir", "out"],
+            "decrypt": ["--encrypted", "encrypted.dnac", "--output", "out/decrypted.png"],
+            "steganography": ["--mode", "extract", "--stego", "stego_image.png", "--output", "out/extracted.dnac"],
+        }
+        os.makedirs(os.path.join(workdir, "out"), exist_ok=True)
+        for cli, args in first_stage_runs.items():
+            results["first_stage"][cli] = _summary(time_first_stage(cli, args, workdir, repeat))
+            print(f"[ℹ] {cli + ' first stage':<27} {results['first_stage'][cli]['median_s'] * 1000:8.1f} ms "
+                  f"(median of {repeat})")
+
+    results["environment"] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    results["repeat"] = repeat
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CLI startup: import time, time to --help and time to first stage")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    parser.add_argument("--output", default="startup_results.json", help="Path to write JSON results")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Fail (exit 1) if any CLI takes longer than this to print --help")
+
+    args = parser.parse_args()
+
+    results = run_startup_benchmark(repeat=args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"[✔] Startup results saved to {args.output}")
+
+    if args.budget_ms is not None:
+        over = {cli: r["median_s"] * 1000 for cli, r in results["help"].items() if r["median_s"] * 1000 > args.budget_ms}
+        for cli, ms in over.items():
+            print(f"[!] {cli} --help takes {ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+        if over:
+            sys.exit(1)
+        print(f"[✔] Every CLI prints --help within {args.budget_ms:.1f} ms")
@@ -1,7 +1,18 @@
-import cv2
-import numpy as np
 import base64
 import os
+from container import is_container_bytes
+from instrumentation import stage
+
+# NumPy and OpenCV are imported inside the functions that use them, so the
+# CLI and the modules importing the constants below start quickly
+
+# LSB header: a 32-bit word whose top bit marks the k-LSB format (low byte
+# holds k), then the payload length in bytes, both at 1 bit per channel.
+# Images written before k-LSB support start with a bare payload bit count
+# (top bit clear) and carry base64 text at 1 bit per channel.
+STEGO_EXTENDED_FLAG = 1 << 31
+STEGO_HEADER_BITS = 64
+STEGO_BITS_PER_CHANNEL = (1, 2, 3, 4)
 
 def binary_to_bytes(binary_str):
     """Convert a binary string to bytes"""
@@ -9,10 +20,7 @@ def binary_to_bytes(binary_str):
 
 def bytes_to_binary(data_bytes):
     """Convert bytes to a binary string"""
-    binary = ""
-    for byte in data_bytes:
-        binary += format(byte, '08b')
-    return binary
+    return "".join(format(byte, '08b') for byte in data_bytes)
 
 def encode_data_length(length, bit_length=32):
     """Encode data length as a binary string of fixed length"""
@@ -22,110 +30,215 @@ def decode_data_length(binary_str, bit_length=32):
     """Decode data length from a binary string"""
     return int(binary_str[:bit_length], 2)
 
-def hide_data_in_image(cover_image_path, data, output_path=None):
+def _payload_layout(stego_flat):
+    """
+    Parse the LSB header of a flattened stego image
+    
+    Returns:
+        (bits per channel, payload bit count, index of the first payload value, legacy format)
+    """
+    import numpy as np
+    
+    word = int.from_bytes(np.packbits(stego_flat[:32] & 1).tobytes(), "big")
+    if not word & STEGO_EXTENDED_FLAG:
+        # Legacy header: the payload's bit count, payload at 1 bit per channel
+        return 1, word, 32, True
+    bits_per_channel = word & 0xFF
+    if bits_per_channel not in STEGO_BITS_PER_CHANNEL:
+        raise ValueError(f"Invalid steganography header (bits per channel {bits_per_channel})")
+    byte_length = int.from_bytes(np.packbits(stego_flat[32:STEGO_HEADER_BITS] & 1).tobytes(), "big")
+    return bits_per_channel, byte_length * 8, STEGO_HEADER_BITS, False
+
+def stego_capacity(cover_image, bits_per_channel=1):
+    """Number of payload bytes a cover image can carry at the given bits per channel"""
+    return max(cover_image.size - STEGO_HEADER_BITS, 0) * bits_per_channel // 8
+
+def hide_data_in_array(cover_image, data, bits_per_channel=1):
+    """Hide data in an in-memory cover image using k-LSB steganography
+    
+    Args:
+        cover_image: uint8 cover image array (left unmodified)
+        data: String (or bytes) data to hide
+        bits_per_channel: Low bits of every channel value used for the payload (1-4)
+    
+    Returns:
+        The steganographic image as a new array
+    """
+    import numpy as np
+    
+    if bits_per_channel not in STEGO_BITS_PER_CHANNEL:
+        raise ValueError(f"bits_per_channel must be one of {STEGO_BITS_PER_CHANNEL}, got {bits_per_channel}")
+    
+    # Convert data to bits (most significant bit first)
+    data_bytes = data.encode() if isinstance(data, str) else data
+    payload_bits = np.unpackbits(np.frombuffer(data_bytes, dtype=np.uint8))
+    
+    # Check if cover image has enough capacity (the header alone needs STEGO_HEADER_BITS channel values)
+    if cover_image.size < STEGO_HEADER_BITS:
+        raise ValueError(f"Data too large for cover image. The header needs {STEGO_HEADER_BITS} channel values, "
+                         f"but image only has {cover_image.size}")
+    image_capacity = stego_capacity(cover_image, bits_per_channel)
+    if len(payload_bits) // 8 > image_capacity:
+        raise ValueError(f"Data too large for cover image. Need {len(payload_bits) // 8} bytes, but image only has "
+                         f"{image_capacity} bytes capacity at {bits_per_channel} bit(s) per channel")
+    
+    # Header (always 1 bit per channel): flag | bits per channel, then payload length in bytes
+    header_bits = np.unpackbits(np.array([STEGO_EXTENDED_FLAG | bits_per_channel, len(payload_bits) // 8],
+                                         dtype=">u4").view(np.uint8))
+    
+    # Group the payload bits into one k-bit value per channel value
+    padding = -len(payload_bits) % bits_per_channel
+    if padding:
+        payload_bits = np.concatenate([payload_bits, np.zeros(padding, dtype=np.uint8)])
+    grouped = payload_bits.reshape(-1, bits_per_channel)
+    values = grouped[:, 0].copy() if bits_per_channel > 1 else payload_bits
+    for column in range(1, bits_per_channel):
+        values <<= 1
+        values |= grouped[:, column]
+    
+    with stage("embed", bytes=len(payload_bits) // 8, bits_per_channel=bits_per_channel):
+        # Flatten a copy of the image for easier processing
+        stego_flat = cover_image.flatten()
+        
+        # Replace the low bits of the header and payload values in one pass each
+        stego_flat[:STEGO_HEADER_BITS] = (stego_flat[:STEGO_HEADER_BITS] & 0xFE) | header_bits
+        end = STEGO_HEADER_BITS + len(values)
+        keep = np.uint8(0xFF ^ ((1 << bits_per_channel) - 1))
+        stego_flat[STEGO_HEADER_BITS:end] = (stego_flat[STEGO_HEADER_BITS:end] & keep) | values
+        
+        # Reshape back to image dimensions
+        return stego_flat.reshape(cover_image.shape)
+
+def extract_data_from_array(stego_image, as_bytes=False, return_format=False):
+    """Extract data hidden in an in-memory steganographic image
+    
+    Reads both the k-LSB format and the original 1-LSB format with a bare
+    bit-count header.
+    
+    Args:
+        stego_image: uint8 steganographic image array
+        as_bytes: Return the raw payload bytes instead of a decoded string
+        return_format: Also return whether the image uses the original format
+    
+    Returns:
+        Extracted data as string (or bytes), or (data, legacy) with return_format
+    """
+    import numpy as np
+    
+    with stage("extract"):
+        # Flatten the image (a view when possible)
+        stego_flat = stego_image.reshape(-1)
+        
+        bits_per_channel, data_length, start, legacy = _payload_layout(stego_flat)
+        
+        # Extract the actual data bits (as many as the image holds)
+        count = -(-data_length // bits_per_channel)
+        values = stego_flat[start:start + count]
+        if bits_per_channel == 1:
+            bits = values & 1
+        else:
+            shifts = np.arange(bits_per_channel - 1, -1, -1, dtype=np.uint8)
+            bits = ((values[:, None] >> shifts) & 1).reshape(-1)[:data_length]
+        extracted_bytes = np.packbits(bits).tobytes()
+    
+    if as_bytes:
+        extracted_data = extracted_bytes
+    else:
+        # Convert bytes to string
+        extracted_data = ""
+        try:
+            extracted_data = extracted_bytes.decode()
+        except Exception as e:
+            print(f"Error decoding extracted data: {str(e)}")
+    
+    return (extracted_data, legacy) if return_format else extracted_data
+
+def hide_data_in_image(cover_image_path, data, output_path=None, bits_per_channel=1):
     """Hide encrypted data in a cover image using LSB steganography
     
     Args:
         cover_image_path: Path to the cover image
-        data: String data to hide (base64 encoded encrypted data)
+        data: String (or bytes) data to hide
         output_path: Path to save the steganographic image (default: stego_image.png)
+        bits_per_channel: Low bits of every channel value used for the payload (1-4)
     
     Returns:
         Path to the steganographic image
     """
+    import cv2
+    
     if output_path is None:
         output_path = "images/stego_image.png"
     
     # Load cover image
-    cover_image = cv2.imread(cover_image_path)
+    with stage("load_cover", path=cover_image_path):
+        cover_image = cv2.imread(cover_image_path)
     if cover_image is None:
         raise ValueError(f"Could not load cover image from {cover_image_path}")
     
-    # Convert data to binary
-    binary_data = bytes_to_binary(data.encode())
-    
-    # Add length header (32 bits / 4 bytes for data length)
-    binary_data = encode_data_length(len(binary_data)) + binary_data
-    data_length = len(binary_data)
-    
-    # Check if cover image has enough capacity
-    height, width, channels = cover_image.shape
-    image_capacity = height * width * channels
-    
-    if data_length > image_capacity:
-        raise ValueError(f"Data too large for cover image. Need {data_length} bits, but image only has {image_capacity} bits capacity")
-    
-    # Flatten the image for easier processing
-    cover_flat = cover_image.flatten()
-    
-    # Create stego image by embedding data
-    stego_flat = cover_flat.copy()
-    
-    for i in range(data_length):
-        # Replace LSB with data bit
-        if binary_data[i] == '1':
-            stego_flat[i] = stego_flat[i] | 1  # Set LSB to 1
-        else:
-            stego_flat[i] = stego_flat[i] & ~1  # Set LSB to 0
-    
-    # Reshape back to image dimensions
-    stego_image = stego_flat.reshape(cover_image.shape)
+    stego_image = hide_data_in_array(cover_image, data, bits_per_channel=bits_per_channel)
     
     # Save steganographic image
-    cv2.imwrite(output_path, stego_image)
+    with stage("write_stego", path=output_path):
+        cv2.imwrite(output_path, stego_image)
     
     return output_path
 
-def extract_data_from_image(stego_image_path):
+def extract_data_from_image(stego_image_path, as_bytes=False):
     """Extract hidden data from a steganographic image
     
     Args:
         stego_image_path: Path to the steganographic image
+        as_bytes: Return the raw payload bytes instead of a decoded string
     
     Returns:
-        Extracted data as string
+        Extracted data as string (or bytes)
     """
+    import cv2
+    
     # Load steganographic image
-    stego_image = cv2.imread(stego_image_path)
+    with stage("load_stego", path=stego_image_path):
+        stego_image = cv2.imread(stego_image_path)
     if stego_image is None:
         raise ValueError(f"Could not load steganographic image from {stego_image_path}")
     
-    # Flatten the image
-    stego_flat = stego_image.flatten()
-    
-    # Extract LSB from each byte to get the binary data
-    extracted_bits = ""
-    for i in range(32):  # First extract the 32-bit length header
-        extracted_bits += '1' if (stego_flat[i] & 1) > 0 else '0'
-    
-    # Decode data length
-    data_length = decode_data_length(extracted_bits)
+    return extract_data_from_array(stego_image, as_bytes=as_bytes)
+
+def hide_encrypted_bytes(cover_image, data_bytes, bits_per_channel=1):
+    """Hide encrypted bytes (e.g. a ciphertext container) in an in-memory cover image
     
-    # Extract the actual data bits
-    for i in range(32, 32 + data_length):
-        if i < len(stego_flat):
-            extracted_bits += '1' if (stego_flat[i] & 1) > 0 else '0'
+    Args:
+        cover_image: uint8 cover image array
+        data_bytes: Encrypted payload, embedded as raw bytes
+        bits_per_channel: Low bits of every channel value used for the payload (1-4)
     
-    # Discard length header
-    extracted_bits = extracted_bits[32:32+data_length]
+    Returns:
+        The steganographic image as a new array
+    """
+    return hide_data_in_array(cover_image, data_bytes, bits_per_channel=bits_per_channel)
+
+def extract_encrypted_bytes(stego_image):
+    """Extract encrypted bytes hidden with hide_encrypted_bytes (or hide_encrypted_data)
     
-    # Convert binary to bytes, then to string
-    extracted_data = ""
-    try:
-        extracted_bytes = binary_to_bytes(extracted_bits)
-        extracted_data = extracted_bytes.decode()
-    except Exception as e:
-        print(f"Error decoding extracted data: {str(e)}")
+    Args:
+        stego_image: uint8 steganographic image array
     
-    return extracted_data
+    Returns:
+        The encrypted payload as bytes
+    """
+    data_bytes, legacy = extract_data_from_array(stego_image, as_bytes=True, return_format=True)
+    # Images from before k-LSB support carry the payload as base64 text
+    return base64.b64decode(data_bytes) if legacy else data_bytes
 
-def hide_encrypted_data(encrypted_data_path, cover_image_path=None, output_path=None):
+def hide_encrypted_data(encrypted_data_path, cover_image_path=None, output_path=None, bits_per_channel=1, verbose=False):
     """Hide encrypted data file in a cover image
     
     Args:
-        encrypted_data_path: Path to the encrypted data file (.npy)
-        cover_image_path: Path to cover image (default: a random image from samples)
+        encrypted_data_path: Path to the encrypted data file (container or legacy .npy)
+        cover_image_path: Path to cover image (default: images/cover.jpg)
         output_path: Path to save steganographic image (default: images/stego_image.png)
+        bits_per_channel: Low bits of every channel value used for the payload (1-4)
+        verbose: Print where the image was saved
     
     Returns:
         Path to the steganographic image
@@ -139,68 +252,54 @@ def hide_encrypted_data(encrypted_data_path, cover_image_path=None, output_path=
         if not os.path.exists(cover_image_path):
             raise ValueError(f"No cover image specified and default cover image not found at {cover_image_path}")
     
-    # Load encrypted data
-    encrypted_data = np.load(encrypted_data_path, allow_pickle=True)
-    
-    # Convert to base64 string for hiding
-    if isinstance(encrypted_data, np.ndarray):
-        # Save array to a temporary binary file
-        np.save("images/temp_data.npy", encrypted_data)
-        with open("images/temp_data.npy", "rb") as f:
-            data_bytes = f.read()
-        os.remove("images/temp_data.npy")
-    else:
-        # Convert to string if not an array
-        data_bytes = str(encrypted_data).encode()
-    
-    # Encode to base64
-    base64_data = base64.b64encode(data_bytes).decode()
+    # Embed the file's bytes as they are (a container or a serialized .npy)
+    with open(encrypted_data_path, "rb") as f:
+        data_bytes = f.read()
     
     # Hide in cover image
-    stego_path = hide_data_in_image(cover_image_path, base64_data, output_path)
+    stego_path = hide_data_in_image(cover_image_path, data_bytes, output_path, bits_per_channel=bits_per_channel)
     
-    print(f"[✔] Encrypted data hidden in {stego_path}")
+    if verbose:
+        print(f"[✔] Encrypted data hidden in {stego_path}")
     return stego_path
 
-def extract_encrypted_data(stego_image_path, output_path=None):
+def extract_encrypted_data(stego_image_path, output_path=None, verbose=False):
     """Extract hidden encrypted data from a steganographic image
     
     Args:
         stego_image_path: Path to the steganographic image
-        output_path: Path to save extracted data (default: images/extracted_encrypted.npy)
+        output_path: Path to save extracted data (default: images/extracted_encrypted.dnac,
+            or .npy for a legacy payload)
+        verbose: Print where the data was saved
     
     Returns:
         Path to the extracted encrypted data
     """
-    if output_path is None:
-        output_path = "images/extracted_encrypted.npy"
+    import cv2
     
-    # Extract hidden data
-    base64_data = extract_data_from_image(stego_image_path)
+    # Load steganographic image
+    with stage("load_stego", path=stego_image_path):
+        stego_image = cv2.imread(stego_image_path)
+    if stego_image is None:
+        raise ValueError(f"Could not load steganographic image from {stego_image_path}")
     
-    # Decode base64
-    data_bytes = base64.b64decode(base64_data)
+    data_bytes = extract_encrypted_bytes(stego_image)
     
-    # Write to temp file then load as numpy array
-    with open("images/temp_extracted.npy", "wb") as f:
+    if output_path is None:
+        suffix = ".dnac" if is_container_bytes(data_bytes) else ".npy"
+        output_path = "images/extracted_encrypted" + suffix
+    
+    with open(output_path, "wb") as f:
         f.write(data_bytes)
     
-    try:
-        # Load as numpy array
-        extracted_data = np.load("images/temp_extracted.npy", allow_pickle=True)
-        np.save(output_path, extracted_data)
-        os.remove("images/temp_extracted.npy")
-    except:
-        # If not a valid numpy file, save as raw data
-        with open(output_path, "wb") as f:
-            f.write(data_bytes)
-    
-    print(f"[✔] Encrypted data extracted to {output_path}")
+    if verbose:
+        print(f"[✔] Encrypted data extracted to {output_path}")
     return output_path
 
 # If module is run directly, demonstrate steganography
 if __name__ == "__main__":
     import argparse
+    from instrumentation import add_instrumentation_arguments, install_from_args
     
     parser = argparse.ArgumentParser(description="Image Steganography Tool")
     parser.add_argument("--mode", choices=["hide", "extract"], required=True, 
@@ -209,18 +308,24 @@ if __name__ == "__main__":
     parser.add_argument("--cover", help="For hide mode: Path to cover image")
     parser.add_argument("--stego", help="Path to steganographic image (output for hide, input for extract)")
     parser.add_argument("--output", help="For extract mode: Path to save extracted data")
+    parser.add_argument("--bits", type=int, default=1, choices=STEGO_BITS_PER_CHANNEL,
+                        help="For hide mode: Low bits per channel value used for the payload")
+    add_instrumentation_arguments(parser)
     
     args = parser.parse_args()
+    install_from_args(args)
     
     try:
         if args.mode == "hide":
             if not args.data:
-                args.data = "images/encrypted.npy"
+                args.data = "images/encrypted.dnac"
             
             hide_encrypted_data(
                 args.data, 
                 cover_image_path=args.cover,
-                output_path=args.stego
+                output_path=args.stego,
+                bits_per_channel=args.bits,
+                verbose=True
             )
         
         elif args.mode == "extract":
@@ -229,7 +334,8 @@ if __name__ == "__main__":
             
             extract_encrypted_data(
                 args.stego,
-                output_path=args.output
+                output_path=args.output,
+                verbose=True
             )
     
     except Exception as e:
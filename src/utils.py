@@ -1,16 +1,143 @@
+import os
 import cv2
 import numpy as np
 
-# Load image as RGB
-def load_image(path):
+# Raw pixel dumps: headerless, so their shape and dtype must be given
+RAW_EXTENSIONS = (".raw", ".bin")
+
+# Uncompressed TIFFs are memory mapped when tifffile is available
+TIFF_EXTENSIONS = (".tif", ".tiff")
+
+# Load image as BGR (full resolution unless a (width, height) size is given)
+def load_image(path, size=None):
     image = cv2.imread(path, cv2.IMREAD_COLOR)
     if image is None:
         raise FileNotFoundError(f"Image at {path} not found.")
-    return cv2.resize(image, (256, 256))  # Resize to ensure consistency
+    return image if size is None else cv2.resize(image, size)
+
+def _open_tiff(path):
+    """Memory map an uncompressed, contiguous TIFF in OpenCV's channel order, or return None"""
+    try:
+        import tifffile
+        image = tifffile.memmap(path, mode="r")
+    except (ImportError, ValueError):
+        return None
+    # RGB -> BGR as a negative-stride view, so no pixel is read yet
+    return image[..., ::-1] if image.ndim == 3 and image.shape[2] == 3 else image
+
+def open_image(path, shape=None, dtype=np.uint8, offset=0):
+    """
+    Open an image as an array without reading it into RAM where the format allows
+
+    `.npy` files, raw pixel dumps (`.raw`/`.bin`, with `shape`) and
+    uncompressed TIFFs are memory mapped read-only: slicing them yields views
+    whose pages are read on demand, so band-by-band consumers only touch one
+    band at a time. Compressed formats cannot be decoded partially by OpenCV
+    and are decoded in full with load_image.
+
+    Args:
+        path: Image path
+        shape: Array shape of a raw pixel dump
+        dtype: Element type of a raw pixel dump
+        offset: Bytes to skip at the start of a raw pixel dump
+
+    Returns:
+        Array (np.memmap or view of one where possible)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Image at {path} not found.")
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension in RAW_EXTENSIONS:
+        if shape is None:
+            raise ValueError(f"The shape of raw pixel file {path} must be given")
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=tuple(shape))
+    if extension in TIFF_EXTENSIONS:
+        image = _open_tiff(path)
+        if image is not None:
+            return image
+    return load_image(path)
+
+def iter_bands(image, band_rows):
+    """Yield (first row, view) for consecutive bands of rows of an array"""
+    for start in range(0, image.shape[0], band_rows):
+        yield start, image[start:start + band_rows]
+
+class ImageWriter:
+    """
+    Write an image band by band
+
+    `.npy`, raw pixel and (with tifffile) TIFF outputs are memory mapped and
+    filled in place, so the full image never has to be in RAM. Other formats
+    are assembled in memory and encoded with OpenCV on close.
+
+    Args:
+        path: Output path
+        shape: Shape of the full image
+        dtype: Element type
+    """
+
+    def __init__(self, path, shape, dtype=np.uint8):
+        self.path = path
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        extension = os.path.splitext(path)[1].lower()
+        self._encode = False
+        self.array = None
+        if extension == ".npy":
+            self.array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        elif extension in RAW_EXTENSIONS:
+            self.array = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+        elif extension in TIFF_EXTENSIONS:
+            try:
+                import tifffile
+                rgb = len(shape) == 3 and shape[2] == 3
+                array = tifffile.memmap(path, shape=shape, dtype=dtype, photometric="rgb" if rgb else "minisblack")
+                self.array = array[..., ::-1] if rgb else array
+            except ImportError:
+                pass
+        if self.array is None:
+            self.array = np.empty(shape, dtype=dtype)
+            self._encode = True
+
+    def write(self, row, band):
+        """Copy a band of rows into the image starting at `row`"""
+        self.array[row:row + len(band)] = band
+
+    def close(self):
+        """Flush a mapped image, or encode an in-memory one"""
+        if self.array is None:
+            return
+        if self._encode:
+            if not cv2.imwrite(self.path, self.array):
+                raise ValueError(f"Could not write image to {self.path}")
+        else:
+            base = self.array
+            while not isinstance(base, np.memmap) and base.base is not None:
+                base = base.base
+            if isinstance(base, np.memmap):
+                base.flush()
+        self.array = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Do not encode a partially written image
+            self.array = None
 
-# Save image
+# Save image (memory mapped formats are written through ImageWriter without an extra copy)
 def save_image(path, image):
-    cv2.imwrite(path, image)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy" or extension in RAW_EXTENSIONS + TIFF_EXTENSIONS:
+        with ImageWriter(path, image.shape, image.dtype) as writer:
+            writer.write(0, image)
+    elif not cv2.imwrite(path, image):
+        raise ValueError(f"Could not write image to {path}")
 
 # Save encrypted data
 def save_file(path, data):
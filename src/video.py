@@ -0,0 +1,327 @@
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from hybrid_crypto import SegmentedCipher, generate_or_load_key
+from container import ContainerWriter, ContainerReader, CONTAINER_SUFFIX
+from encrypt import container_header, collect_batch_inputs
+from decrypt import container_cipher
+from instrumentation import stage, add_instrumentation_arguments, install_from_args
+
+# NumPy, OpenCV and the DNA/chaos modules are imported inside the functions
+# that use them, like the other CLIs
+
+# Every frame is one AES-GCM segment (and one container chunk), so segment i
+# is frame i: its nonce is the stream's base nonce followed by the frame
+# index, and the final frame carries the last-segment flag
+FRAMES_CONTENT = "frames"
+
+# Frame throughput favours whole-block scrambling (nucleotide scrambling of
+# a 1080p frame alone takes seconds); packed permutations keep the cached
+# per-resolution permutation in uint32
+VIDEO_SCRAMBLE_MODE = "block"
+VIDEO_PERMUTATION = "packed"
+
+def read_frames(source):
+    """
+    Yield the frames of a video file, or of an image directory / glob pattern in name order
+
+    Returns:
+        (frame iterator, source frames per second or None)
+    """
+    import cv2
+
+    if os.path.isfile(source):
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise ValueError(f"Could not open video {source}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or None
+
+        def frames():
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        return
+                    yield frame
+            finally:
+                capture.release()
+        return frames(), fps
+
+    paths = collect_batch_inputs(source)
+    if not paths:
+        raise ValueError(f"No frames found for {source}")
+
+    def frames():
+        for path in paths:
+            frame = cv2.imread(path)
+            if frame is None:
+                raise ValueError(f"Could not load frame from {path}")
+            yield frame
+    return frames(), None
+
+def _encode_frame(frame, scramble):
+    """Scramble and DNA encode one frame; returns the DNA text bytes"""
+    from dna_crypto import image_to_dna_codes, dna_codes_to_text
+    from chaos import scramble_pixels
+
+    mode = scramble["mode"]
+    if mode == "nucleotide":
+        codes = scramble_pixels(image_to_dna_codes(frame), seed=scramble["seed"], r=scramble["r"],
+                                method=scramble["method"])
+    else:
+        codes = image_to_dna_codes(scramble_pixels(frame, seed=scramble["seed"], r=scramble["r"],
+                                                   method=scramble["method"], mode=mode,
+                                                   block_size=scramble.get("block_size", 8)))
+    return dna_codes_to_text(codes, as_bytes=True)
+
+def _decode_frame(plaintext, shape, scramble):
+    """Reverse _encode_frame"""
+    from dna_crypto import dna_text_to_codes, dna_codes_to_image
+    from chaos import unscramble_pixels
+
+    mode = scramble["mode"]
+    codes = dna_text_to_codes(plaintext)
+    if mode == "nucleotide":
+        codes = unscramble_pixels(codes, seed=scramble["seed"], r=scramble["r"], method=scramble["method"])
+        return dna_codes_to_image(codes, shape)
+    return unscramble_pixels(dna_codes_to_image(codes, shape), seed=scramble["seed"], r=scramble["r"],
+                             method=scramble["method"], mode=mode, block_size=scramble.get("block_size", 8))
+
+def encrypt_frames(frames, target, fps=None, key_manager=None, seed=0.5, r=3.99, permutation=VIDEO_PERMUTATION,
+                   scramble_mode=VIDEO_SCRAMBLE_MODE, block_size=8, workers=None):
+    """
+    Encrypt a sequence of equally sized frames into one indexed ciphertext container
+
+    The key and the per-resolution permutation are loaded once for the
+    whole sequence (the shared permutation cache is keyed by size). Frames
+    are encrypted on a thread pool while the next ones are being decoded,
+    with a bounded number in flight, and written in order.
+
+    Args:
+        frames: Iterable of uint8 frame arrays
+        target: Path or binary file object the container is written to
+        fps: Source frame rate, stored in the header
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+        seed: Logistic map seed used for scrambling
+        r: Logistic map control parameter used for scrambling
+        permutation: Scrambling permutation generator (see chaos.PERMUTATION_METHODS)
+        scramble_mode: Scrambling unit (see chaos.SCRAMBLE_MODES)
+        block_size: Block side for the "block" scramble mode
+        workers: Encryption threads (default: CPU count)
+
+    Returns:
+        Report dictionary (frames, seconds, frames per second, MB/s)
+    """
+    import numpy as np
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No frames to encrypt")
+    first = np.ascontiguousarray(first)
+    if first.dtype != np.uint8:
+        raise ValueError(f"Expected uint8 frames, got {first.dtype}")
+    shape = first.shape
+
+    cipher = SegmentedCipher(key_manager=key_manager)
+    header = container_header(first, band_rows=shape[0], cipher=cipher, segment_size=first.nbytes * 4, seed=seed, r=r,
+                              permutation=permutation, scramble_mode=scramble_mode, block_size=block_size)
+    header.update({"content": FRAMES_CONTENT, "fps": fps})
+    scramble = header["scramble"]
+
+    def encrypt_one(index, frame, last):
+        if frame.shape != shape or frame.dtype != np.uint8:
+            raise ValueError(f"Frame {index} is {frame.dtype} {frame.shape}; expected uint8 {shape}")
+        with stage("encrypt_frame", frame=index):
+            return cipher.encrypt_segment(index, _encode_frame(np.ascontiguousarray(frame), scramble), last=last)
+
+    workers = workers or os.cpu_count()
+    count = 0
+    start = time.perf_counter()
+    with ContainerWriter(target, header) as writer, ThreadPoolExecutor(max_workers=workers) as pool:
+        cipher.associated_data = writer.header_bytes
+        pending = deque()
+        # Read one frame ahead: the last frame's nonce carries the final-segment flag
+        current = first
+        for upcoming in frames:
+            pending.append(pool.submit(encrypt_one, count, current, False))
+            current, count = upcoming, count + 1
+            while len(pending) >= workers * 2:
+                writer.write_chunk(pending.popleft().result())
+        pending.append(pool.submit(encrypt_one, count, current, True))
+        count += 1
+        while pending:
+            writer.write_chunk(pending.popleft().result())
+    seconds = time.perf_counter() - start
+
+    return {
+        "frames": count,
+        "shape": list(shape),
+        "seconds": seconds,
+        "fps": count / seconds if seconds > 0 else 0.0,
+        "mb_per_s": count * first.nbytes / 1e6 / seconds if seconds > 0 else 0.0,
+        "source_fps": fps,
+    }
+
+def encrypt_video(source, output_path=None, key_manager=None, permutation=VIDEO_PERMUTATION,
+                  scramble_mode=VIDEO_SCRAMBLE_MODE, block_size=8, workers=None, verbose=False):
+    """
+    Encrypt a video file or a frame directory / glob pattern into one container
+
+    Progress and throughput are printed with verbose.
+
+    Returns:
+        (container path, report dictionary)
+    """
+    if output_path is None:
+        output_path = os.path.join("images", "encrypted_frames" + CONTAINER_SUFFIX)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    frames, fps = read_frames(source)
+    if verbose:
+        print(f"[1/2] Encrypting frames from {source}...")
+    report = encrypt_frames(frames, output_path, fps=fps, key_manager=key_manager, permutation=permutation,
+                            scramble_mode=scramble_mode, block_size=block_size, workers=workers)
+    if verbose:
+        print(f"[2/2] {report['frames']} frame(s) encrypted to {output_path}")
+        print(f"[ℹ] Sustained {report['fps']:.2f} frames/s ({report['mb_per_s']:.2f} MB/s) over {report['seconds']:.2f}s"
+              + (f", source is {report['source_fps']:.2f} frames/s" if report["source_fps"] else ""))
+    return output_path, report
+
+class EncryptedFrames:
+    """
+    Random access to the frames of an encrypted frame container
+
+    Any frame can be decrypted on its own: only its chunk is read and
+    authenticated, under the nonce derived from its index.
+
+    Args:
+        source: Container path or in-memory container bytes
+        key_manager: KeyManager holding the AES key (default: process-wide manager)
+    """
+
+    def __init__(self, source, key_manager=None):
+        self._reader = ContainerReader(source)
+        header = self._reader.header
+        if header.get("content") != FRAMES_CONTENT:
+            self._reader.close()
+            raise ValueError("Not an encrypted frame container (use decrypt.py for images)")
+        self.header = header
+        self.shape = tuple(header["shape"])
+        self.fps = header.get("fps")
+        self._cipher = container_cipher(self._reader, key_manager=key_manager)
+
+    def __len__(self):
+        return len(self._reader)
+
+    def frame(self, index):
+        """Decrypt one frame (negative indices count from the end)"""
+        count = len(self._reader)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f"Frame {index} outside 0..{count - 1}")
+        with stage("decrypt_frame", frame=index):
+            plaintext = self._cipher.decrypt_segment(index, self._reader.chunk(index), last=index == count - 1)
+            return _decode_frame(plaintext, self.shape, self.header["scramble"])
+
+    def __getitem__(self, index):
+        return self.frame(index)
+
+    def frames(self, start=0, stop=None, workers=None):
+        """Yield frames [start, stop) in order, decrypting ahead on a thread pool"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        workers = workers or os.cpu_count()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for index in range(start, stop):
+                pending.append(pool.submit(self.frame, index))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def close(self):
+        self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def decrypt_video(encrypted_path, output_dir="images/frames", start=0, stop=None, key_manager=None, workers=None,
+                  verbose=False):
+    """
+    Decrypt a range of frames to numbered PNG files
+
+    Progress and throughput are printed with verbose.
+
+    Returns:
+        Report dictionary (frames written, seconds, frames per second)
+    """
+    import cv2
+
+    os.makedirs(output_dir, exist_ok=True)
+    with EncryptedFrames(encrypted_path, key_manager=key_manager) as frames:
+        stop = len(frames) if stop is None else min(stop, len(frames))
+        digits = max(6, len(str(len(frames))))
+        if verbose:
+            print(f"[1/2] Decrypting frames {start}..{stop - 1} of {len(frames)} from {encrypted_path}...")
+        begin = time.perf_counter()
+        for index, frame in enumerate(frames.frames(start, stop, workers=workers), start):
+            cv2.imwrite(os.path.join(output_dir, f"frame_{index:0{digits}d}.png"), frame)
+        seconds = time.perf_counter() - begin
+    count = max(0, stop - start)
+    report = {"frames": count, "seconds": seconds, "fps": count / seconds if seconds > 0 else 0.0}
+    if verbose:
+        print(f"[2/2] {count} frame(s) written to {output_dir}")
+        print(f"[ℹ] Sustained {report['fps']:.2f} frames/s over {seconds:.2f}s")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encrypt video or frame sequences into one seekable container")
+    parser.add_argument("--mode", choices=["encrypt", "decrypt", "info"], required=True, help="Operation mode")
+    parser.add_argument("--source", help="For encrypt mode: video file, frame directory or glob pattern")
+    parser.add_argument("--encrypted", default="images/encrypted_frames.dnac", help="Frame container path")
+    parser.add_argument("--output-dir", default="images/frames", help="For decrypt mode: directory for decrypted frames")
+    parser.add_argument("--start", type=int, default=0, help="For decrypt mode: first frame")
+    parser.add_argument("--stop", type=int, help="For decrypt mode: frame after the last one (default: end)")
+    parser.add_argument("--scramble", choices=("nucleotide", "pixel", "row", "block"), default=VIDEO_SCRAMBLE_MODE,
+                        help="Scrambling unit")
+    parser.add_argument("--block-size", type=int, default=8, help="Block side for --scramble block")
+    parser.add_argument("--permutation", choices=("argsort", "packed"), default=VIDEO_PERMUTATION,
+                        help="Scrambling permutation generator")
+    parser.add_argument("--workers", type=int, help="Threads (default: CPU count)")
+    parser.add_argument("--report", help="Write the throughput report as JSON")
+    add_instrumentation_arguments(parser)
+
+    args = parser.parse_args()
+    install_from_args(args)
+
+    try:
+        if args.mode == "info":
+            with EncryptedFrames(args.encrypted) as frames:
+                print(f"[ℹ] {len(frames)} frame(s) of {frames.shape}, "
+                      f"{frames.fps or 'unknown'} frames/s, scramble {frames.header['scramble']}")
+            sys.exit(0)
+        generate_or_load_key()
+        if args.mode == "encrypt":
+            if not args.source:
+                raise ValueError("--source is required for encrypt mode")
+            _, report = encrypt_video(args.source, args.encrypted, permutation=args.permutation,
+                                      scramble_mode=args.scramble, block_size=args.block_size, workers=args.workers,
+                                      verbose=True)
+        else:
+            report = decrypt_video(args.encrypted, output_dir=args.output_dir, start=args.start, stop=args.stop,
+                                   workers=args.workers, verbose=True)
+        if args.report:
+            import json
+            with open(args.report, "w") as f:
+                json.dump(report, f, indent=4)
+    except Exception as e:
+        print(f"[✘] Video {args.mode} failed: {str(e)}")
+        sys.exit(1)
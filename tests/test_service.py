@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import hybrid_crypto  # noqa: E402
+from service import EncryptionService, ServiceClient  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def throwaway_key(tmp_path, monkeypatch):
+    """Keep the service (and its forked workers) off the repository's AES key"""
+    monkeypatch.setattr(hybrid_crypto, "_DEFAULT_KEY_MANAGER", hybrid_crypto.KeyManager(str(tmp_path / "aes_key.bin")))
+
+def _write_image(path, side):
+    image = np.random.default_rng(side).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    cv2.imwrite(str(path), image)
+    return image
+
+def test_loopback_round_trip(tmp_path):
+    image = _write_image(tmp_path / "input.png", 32)
+
+    async def scenario():
+        async with EncryptionService(port=0, workers=2) as service:
+            with ServiceClient(service.address, timeout=60) as client:
+                encrypted = await asyncio.to_thread(client.call, "encrypt", image=str(tmp_path / "input.png"),
+                                                    output_dir=str(tmp_path))
+                decrypted = await asyncio.to_thread(client.call, "decrypt", encrypted=encrypted["result"]["output"],
+                                                    output=str(tmp_path / "decrypted.png"))
+                unknown = await asyncio.to_thread(client.call, "shred")
+                stats = await asyncio.to_thread(client.call, "stats")
+        return encrypted, decrypted, unknown, stats
+
+    encrypted, decrypted, unknown, stats = asyncio.run(scenario())
+    assert encrypted["ok"] and decrypted["ok"], (encrypted, decrypted)
+    assert np.array_equal(cv2.imread(decrypted["result"]["output"]), image)
+    assert not unknown["ok"] and "Unknown op" in unknown["error"]
+    result = stats["result"]
+    assert (result["submitted"], result["completed"], result["failed"]) == (2, 2, 0)
+    assert result["latency"]["encrypt"]["count"] == 1 and result["queue_depth"] == 0
+
+def test_backpressure_and_close(tmp_path):
+    _write_image(tmp_path / "input.png", 384)
+    jobs = 6
+
+    async def scenario():
+        service = await EncryptionService(port=0, workers=1, queue_size=1).start()
+        sender = socket.create_connection(service.address, timeout=30)
+        try:
+            request = {"op": "encrypt", "image": str(tmp_path / "input.png"), "output_dir": str(tmp_path)}
+            sender.sendall("".join(json.dumps({**request, "id": i}) + "\n" for i in range(jobs)).encode())
+
+            # One job runs, one waits in the queue and the reader blocks on the rest
+            deadline = time.monotonic() + 30
+            while not (service.stats()["in_flight"] == 1 and service.stats()["queue_depth"] == 1):
+                assert time.monotonic() < deadline, service.stats()
+                await asyncio.sleep(0.01)
+            saturated = service.stats()
+
+            started = time.monotonic()
+            await asyncio.wait_for(service.close(), timeout=60)
+            closing_s = time.monotonic() - started
+            # Queued and blocked jobs are dropped and the connection is closed
+            received = b""
+            while chunk := await asyncio.to_thread(sender.recv, 1 << 16):
+                received += chunk
+        finally:
+            sender.close()
+        return saturated, closing_s, received
+
+    saturated, closing_s, received = asyncio.run(scenario())
+    assert saturated["queue_depth"] <= saturated["queue_size"] == 1
+    assert saturated["submitted"] < jobs
+    assert closing_s < 60
+    answered = [json.loads(line) for line in received.splitlines()]
+    assert len(answered) < jobs
+
+def test_remote_hosts_need_a_token():
+    with pytest.raises(ValueError, match="non-loopback"):
+        EncryptionService(host="0.0.0.0")
+    with pytest.raises(ValueError, match="requires a token"):
+        EncryptionService(host="0.0.0.0", allow_remote=True)
+
+    async def scenario():
+        async with EncryptionService(port=0, workers=1, token="s3cret") as service:
+            with ServiceClient(service.address, timeout=30) as client:
+                refused = await asyncio.to_thread(client.call, "ping")
+            with ServiceClient(service.address, timeout=30, token="s3cret") as client:
+                accepted = await asyncio.to_thread(client.call, "ping")
+        return refused, accepted
+
+    refused, accepted = asyncio.run(scenario())
+    assert not refused["ok"] and "token" in refused["error"]
+    assert accepted["ok"]